@@ -0,0 +1,142 @@
+"""Gráficos de relatório renderizados no servidor com matplotlib (backend Agg, sem tela).
+
+Os dados vêm das mesmas agregações do /transactions/report (monthly_rollups quando não há
+recorte de datas), então o cliente recebe só a imagem, nunca o histórico. A renderização
+roda num pool próprio e limitado, como o bcrypt em app.hashing: cheio, responde 503 com
+Retry-After.
+
+As imagens ficam num cache endereçado pelo conteúdo de entrada: o hash de (usuário, tipo
+de gráfico, formato, parâmetros, versão dos dados). Ver o mesmo gráfico de novo custa a
+consulta da versão e um acerto no cache; o hash também serve de ETag.
+"""
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from app.cache import TTLCache
+from app.config import settings
+
+KINDS = ("category", "monthly", "balance")
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Agrupamentos do relatório usados por cada gráfico
+GROUPS = {"category": ["category"], "monthly": ["month", "type"], "balance": ["month", "type"]}
+
+INCOME_COLOR, EXPENSE_COLOR, BALANCE_COLOR = "#2e9d5b", "#d9534f", "#3a6fd8"
+
+chart_cache = TTLCache(maxsize=settings.CHART_CACHE_SIZE, ttl=settings.CHART_CACHE_TTL_SECONDS)
+
+
+def cache_key(user_id: int, kind: str, format: str, params: dict, version: int) -> str:
+    raw = "|".join([str(user_id), kind, format, *(f"{k}={params[k]}" for k in sorted(params)), str(version)])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# =====================
+# DESENHO
+# =====================
+
+def _monthly_series(buckets):
+    months = sorted({b["month"] for b in buckets if b["month"]})
+    income = {m: 0.0 for m in months}
+    expense = {m: 0.0 for m in months}
+    for b in buckets:
+        if b["month"]:
+            (income if b["type"] == "income" else expense)[b["month"]] += b["total"]
+    return months, [income[m] for m in months], [expense[m] for m in months]
+
+
+def _draw_category(ax, buckets):
+    buckets = sorted(buckets, key=lambda b: b["total"], reverse=True)
+    labels = [b["category"] or "Sem categoria" for b in buckets]
+    ax.pie([b["total"] for b in buckets], labels=labels, autopct="%1.1f%%", startangle=90, counterclock=False)
+    ax.set_title("Gastos por categoria")
+    ax.axis("equal")
+
+
+def _draw_monthly(ax, buckets):
+    months, income, expense = _monthly_series(buckets)
+    x = range(len(months))
+    ax.bar([i - 0.2 for i in x], income, width=0.4, label="Entradas", color=INCOME_COLOR)
+    ax.bar([i + 0.2 for i in x], expense, width=0.4, label="Saídas", color=EXPENSE_COLOR)
+    ax.set_xticks(list(x), months, rotation=45, ha="right")
+    ax.set_title("Entradas e saídas por mês")
+    ax.legend()
+
+
+def _draw_balance(ax, buckets):
+    months, income, expense = _monthly_series(buckets)
+    balance, running = [], 0.0
+    for i, e in zip(income, expense):
+        running += i - e
+        balance.append(running)
+    ax.plot(months, balance, marker="o", color=BALANCE_COLOR)
+    ax.axhline(0, color="#999999", linewidth=0.8)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.set_title("Saldo acumulado")
+
+
+DRAW = {"category": _draw_category, "monthly": _draw_monthly, "balance": _draw_balance}
+
+_Figure = None
+
+
+def _figure_class():
+    """Importa o matplotlib no primeiro gráfico, e não na subida de cada worker (~0,6 s)."""
+    global _Figure
+    if _Figure is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        matplotlib.rcParams["svg.hashsalt"] = "moneytrack"  # ids estáveis no SVG: mesma entrada, mesmos bytes
+        from matplotlib.figure import Figure
+        _Figure = Figure
+    return _Figure
+
+
+def render(kind: str, format: str, buckets: list[dict]) -> bytes:
+    # Figure direto (sem pyplot): cada chamada tem sua figura, seguro entre threads
+    fig = _figure_class()(figsize=(8, 5), dpi=100, layout="tight")
+    ax = fig.add_subplot()
+    if buckets:
+        DRAW[kind](ax, buckets)
+    else:
+        ax.text(0.5, 0.5, "Sem dados no período", ha="center", va="center", fontsize=14)
+        ax.set_axis_off()
+    buffer = io.BytesIO()
+    metadata = {"Date": None} if format == "svg" else None
+    fig.savefig(buffer, format=format, metadata=metadata)
+    return buffer.getvalue()
+
+
+# =====================
+# POOL DE RENDERIZAÇÃO
+# =====================
+
+class ChartRenderer:
+    """Renderiza num pool limitado: `workers` em execução e `queue_size` esperando."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="charts")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def _submit(self, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado gerando gráficos, tente novamente em instantes",
+                headers={"Retry-After": str(settings.CHART_RETRY_AFTER_SECONDS)},
+            )
+        try:
+            future = self._executor.submit(render, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def render(self, kind: str, format: str, buckets: list[dict]) -> bytes:
+        return self._submit(kind, format, buckets).result()
+
+
+renderer = ChartRenderer(settings.CHART_WORKERS, settings.CHART_QUEUE_SIZE)
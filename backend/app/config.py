@@ -1,15 +1,106 @@
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import URL
 
 class Settings(BaseSettings):
+    # Banco: DATABASE_URL tem prioridade; com DB_DRIVER (ex.: "postgresql+psycopg2") a URL é
+    # montada a partir de DB_USER/DB_PASS/DB_HOST/DB_PORT/DB_NAME; sem nenhum dos dois, SQLite local
+    DATABASE_URL: str | None = None
+    DB_DRIVER: str | None = None
     DB_HOST: str = "localhost"
+    DB_PORT: int | None = None
     DB_NAME: str = "moneytrack"
     DB_USER: str = "root"
     DB_PASS: str = ""
+    # Pool de conexões e limites por statement
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # Ajustes aplicados a cada conexão quando o banco é SQLite
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Tokens JWT: novos tokens são assinados com SECRET_KEY e levam JWT_KEY_ID no cabeçalho (kid);
+    # na rotação, a chave anterior vai para JWT_PREVIOUS_KEYS ({"kid": "chave"}) e continua
+    # aceita na verificação até os tokens emitidos com ela expirarem
     SECRET_KEY: str = "chave_super_secreta"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    JWT_KEY_ID: str = "default"
+    JWT_PREVIOUS_KEYS: dict[str, str] = {}
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Cache dos tokens de acesso já verificados (nunca além do exp do token)
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_TTL_SECONDS: float = 300
+    # Cache em memória dos usuários autenticados (0 desliga)
+    USER_CACHE_SIZE: int = 4096
+    USER_CACHE_TTL_SECONDS: float = 60
+    # bcrypt: custo e pool dedicado (acima de HASH_WORKERS + HASH_QUEUE_SIZE responde 503)
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_SIZE: int = 16
+    HASH_RETRY_AFTER_SECONDS: int = 1
+    # Modo assíncrono: AsyncSession (aiosqlite/asyncpg) e rotas async com prioridade sobre as síncronas
+    ASYNC_DB: bool = False
+    # Listagens serializadas direto com orjson, sem validar cada linha com o Pydantic
+    FAST_JSON: bool = True
+    # Instrumentação: latência por rota e queries por requisição em /metrics (Prometheus);
+    # SERVER_TIMING devolve o cabeçalho Server-Timing (app/db) em cada resposta, para depuração
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING: bool = False
+    # Diagnóstico de SQL: loga queries acima de SLOW_QUERY_MS e statements repetidos mais de
+    # N_PLUS_ONE_THRESHOLD vezes na mesma requisição (provável N+1)
+    DIAGNOSTICS: bool = False
+    SLOW_QUERY_MS: float = 100
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # Cache das projeções (a chave inclui a versão dos dados do usuário)
+    FORECAST_CACHE_SIZE: int = 1024
+    FORECAST_CACHE_TTL_SECONDS: float = 3600
+    # Gráficos (matplotlib): pool de renderização limitado e cache das imagens
+    CHART_WORKERS: int = 2
+    CHART_QUEUE_SIZE: int = 8
+    CHART_RETRY_AFTER_SECONDS: int = 2
+    CHART_CACHE_SIZE: int = 256
+    CHART_CACHE_TTL_SECONDS: float = 3600
+    # Tarefas em segundo plano: JOB_WORKERS em execução e no máximo JOB_QUEUE_SIZE na fila
+    # (acima disso POST /jobs responde 503). Uma tarefa "running" sem sinal de vida há
+    # JOB_STALE_SECONDS (processo reiniciado ou morto) volta para a fila
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 100
+    JOB_RETRY_AFTER_SECONDS: int = 5
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_STALE_SECONDS: float = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RESULTS_DIR: str = "job_results"
+    # Tarefas finalizadas (e seus arquivos) são apagadas depois desse prazo
+    JOB_RESULTS_RETENTION_HOURS: float = 24
+    JOB_CLEANUP_INTERVAL_SECONDS: float = 600
+    # Servidor (python -m app.serve): endereço e número de processos (prefork)
+    HOST: str = "0.0.0.0"
+    PORT: int = 10000
+    WEB_CONCURRENCY: int = 1
+    # Cria tabelas e aplica migrações na subida do app. O app.serve faz isso uma vez antes de
+    # abrir os workers e desliga aqui; com uvicorn direto (ex.: --reload) fica ligado
+    DB_AUTO_MIGRATE: bool = True
 
     class Config:
         env_file = ".env"
 
+    @property
+    def database_url(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+        if self.DB_DRIVER:
+            return URL.create(
+                self.DB_DRIVER,
+                username=self.DB_USER,
+                password=self.DB_PASS,
+                host=self.DB_HOST,
+                port=self.DB_PORT,
+                database=self.DB_NAME,
+            ).render_as_string(hide_password=False)
+        return "sqlite:///./moneytrack.db"
+
 settings = Settings()
@@ -1,27 +1,110 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from app.config import settings
 
-load_dotenv()
+SQLALCHEMY_DATABASE_URL = settings.database_url
 
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
+# Drivers assíncronos equivalentes aos síncronos
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./moneytrack.db"
-connect_args = {"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+def async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def engine_options(url: str) -> dict:
+    """Argumentos de create_engine/create_async_engine conforme o banco e o Settings."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+
+    if backend == "sqlite":
+        # O timeout do driver é o tempo máximo esperando o lock de escrita
+        connect_args = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    elif url.get_driver_name() == "asyncpg":
+        connect_args = {"server_settings": {"statement_timeout": str(timeout)}}
+    elif backend == "postgresql":
+        connect_args = {"options": f"-c statement_timeout={timeout}"}
+    elif backend in ("mysql", "mariadb"):
+        connect_args = {"init_command": f"SET SESSION max_execution_time={timeout}"}
+    else:
+        connect_args = {}
+
+    options = {"connect_args": connect_args, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not (backend == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    return options
+
+
+def configure_sqlite(engine):
+    """Aplica WAL, synchronous, mmap e busy_timeout em cada nova conexão SQLite.
+
+    Com WAL os leitores não bloqueiam o escritor, e o busy_timeout faz escritores
+    concorrentes esperarem o lock em vez de falharem com "database is locked".
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL, **kwargs):
+    engine = create_engine(url, **{**engine_options(url), **kwargs})
+    configure_sqlite(engine)
+    return engine
+
+
+def make_async_engine(url: str = SQLALCHEMY_DATABASE_URL, **kwargs):
+    url = async_url(url)
+    options = engine_options(url)
+    if "poolclass" in kwargs:
+        for option in ("pool_size", "max_overflow", "pool_recycle"):
+            options.pop(option, None)
+    engine = create_async_engine(url, **{**options, **kwargs})
+    configure_sqlite(engine.sync_engine)
+    return engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# O engine assíncrono só é criado no modo ASYNC_DB (exige aiosqlite/asyncpg instalados)
+async_engine = None
+AsyncSessionLocal = None
+if settings.ASYNC_DB:
+    async_engine = make_async_engine()
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Dependência: cria e fecha a sessão automaticamente
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Versão assíncrona da dependência
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
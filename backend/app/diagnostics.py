@@ -0,0 +1,72 @@
+"""Modo de diagnóstico de SQL: log de queries lentas e detector de N+1.
+
+Ligado por DIAGNOSTICS=true. Toda query acima de SLOW_QUERY_MS vai para o logger
+"moneytrack.sql" com os parâmetros e a rota que a executou. Quando uma mesma forma de
+statement (o SQL parametrizado, sem os valores) roda mais de N_PLUS_ONE_THRESHOLD vezes
+na mesma requisição, ela é sinalizada uma vez como provável N+1.
+
+A rota vem do contexto da requisição criado pelo app.metrics.MetricsMiddleware.
+"""
+import logging
+import time
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger("moneytrack.sql")
+
+MAX_LOGGED_PARAMETERS = 500  # caracteres
+
+
+def _route(stats) -> str:
+    if stats is None or stats.scope is None:
+        return "fora de requisição"
+    return f"{stats.scope['method']} {metrics.route_template(stats.scope)}"
+
+
+def _parameters(parameters) -> str:
+    text = repr(parameters)
+    return text if len(text) <= MAX_LOGGED_PARAMETERS else text[:MAX_LOGGED_PARAMETERS] + "..."
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("diagnostics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("diagnostics_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats = metrics.current_request.get()
+
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "Query lenta (%.1f ms) em %s: %s | parâmetros: %s",
+            elapsed_ms, _route(stats), statement, _parameters(parameters),
+        )
+
+    if stats is not None:
+        if stats.shapes is None:
+            stats.shapes = Counter()
+        stats.shapes[statement] += 1
+        # Avisa uma única vez por forma de statement e requisição
+        if stats.shapes[statement] == settings.N_PLUS_ONE_THRESHOLD + 1:
+            logger.warning(
+                "Provável N+1 em %s: o mesmo statement rodou mais de %d vezes: %s",
+                _route(stats), settings.N_PLUS_ONE_THRESHOLD, statement,
+            )
+
+
+def enable():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def disable():
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,63 @@
+"""Exportação de transações em CSV ou NDJSON, gerada em streaming.
+
+As linhas são lidas do banco em blocos de CHUNK_SIZE (yield_per) e cada bloco vira um
+pedaço da resposta, então a memória fica constante e o primeiro byte sai logo.
+"""
+import csv
+import io
+import orjson
+from sqlalchemy import select
+from app import models
+
+CHUNK_SIZE = 1000
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+COLUMNS = ("id", "date", "description", "category", "type", "amount")
+
+
+def export_statement(conditions):
+    return (
+        select(*(getattr(models.Transaction, column) for column in COLUMNS))
+        .where(*conditions)
+        .order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+
+
+def _row_values(row):
+    return {
+        "id": row.id,
+        "date": row.date.isoformat() if row.date else None,
+        "description": row.description,
+        "category": row.category,
+        "type": row.type,
+        "amount": float(row.amount),
+    }
+
+
+def iter_csv(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for partition in result.partitions():
+        for row in partition:
+            values = _row_values(row)
+            writer.writerow([values[column] if values[column] is not None else "" for column in COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(result):
+    for partition in result.partitions():
+        yield b"".join(orjson.dumps(_row_values(row)) + b"\n" for row in partition)
+
+
+def stream(result, format: str):
+    return iter_csv(result) if format == "csv" else iter_ndjson(result)
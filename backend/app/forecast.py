@@ -0,0 +1,126 @@
+"""Projeção de fluxo de caixa com NumPy.
+
+Os totais mensais do usuário (tabela monthly_rollups: mês, tipo, categoria e centavos) são
+lidos numa única query e viram arrays; a partir daí tudo é vetorizado: matriz
+categoria x mês com np.add.at, média móvel dos últimos meses e tendência linear por mínimos
+quadrados calculada de uma vez para todas as séries.
+
+O resultado depende só dos dados do usuário, então fica em cache pela versão dos dados
+(users.data_version): qualquer escrita gera uma chave nova.
+"""
+import numpy as np
+from sqlalchemy import BigInteger, select, type_coerce
+from sqlalchemy.orm import Session
+from app import models
+from app.cache import TTLCache
+from app.config import settings
+
+ROLLING_WINDOW = 3
+MAX_MONTHS = 24
+
+forecast_cache = TTLCache(maxsize=settings.FORECAST_CACHE_SIZE, ttl=settings.FORECAST_CACHE_TTL_SECONDS)
+
+
+def monthly_statement(user_id: int):
+    rollup = models.MonthlyRollup
+    return select(
+        rollup.month, rollup.type, rollup.category, type_coerce(rollup.total, BigInteger)
+    ).where(rollup.user_id == user_id, rollup.month != "")
+
+
+def linear_trend(y: np.ndarray):
+    """Inclinação e intercepto (por linha de `y`) da reta de mínimos quadrados sobre x = 0..n-1."""
+    n = y.shape[-1]
+    x = np.arange(n, dtype=float)
+    if n < 2:
+        return np.zeros(y.shape[:-1]), y[..., -1].astype(float)
+    x_centered = x - x.mean()
+    slope = (y - y.mean(axis=-1, keepdims=True)) @ x_centered / (x_centered @ x_centered)
+    intercept = y.mean(axis=-1) - slope * x.mean()
+    return slope, intercept
+
+
+def rolling_average(y: np.ndarray, window: int = ROLLING_WINDOW) -> np.ndarray:
+    """Média dos últimos `window` meses, por linha de `y`."""
+    window = min(window, y.shape[-1])
+    if window == 0:
+        return np.zeros(y.shape[:-1])
+    return y[..., -window:].mean(axis=-1)
+
+
+def _month_labels(indexes: np.ndarray) -> list[str]:
+    return np.datetime_as_string(indexes.astype("datetime64[M]"), unit="M").tolist()
+
+
+def _reais(cents: np.ndarray) -> list:
+    return np.round(cents / 100, 2).tolist()
+
+
+def compute(rows, months: int) -> dict:
+    if not rows:
+        return {"months": months, "history": [], "rolling_average": None, "trend": None,
+                "forecast": [], "categories": []}
+
+    month_str, types, categories, cents = (np.array(column) for column in zip(*rows))
+    month_index = month_str.astype("datetime64[M]").astype(np.int64)
+    cents = cents.astype(float)
+    is_income = types == "income"
+
+    first, last = month_index.min(), month_index.max()
+    span = int(last - first) + 1
+    column = month_index - first
+
+    # Entradas e saídas por mês (meses sem movimento ficam zerados)
+    totals = np.zeros((2, span))
+    np.add.at(totals, (np.where(is_income, 0, 1), column), cents)
+
+    # Uma linha por (tipo, categoria) na matriz de meses
+    keys = np.char.add(np.char.add(types.astype(str), "\x1f"), categories.astype(str))
+    unique_keys, key_index = np.unique(keys, return_inverse=True)
+    by_category = np.zeros((len(unique_keys), span))
+    np.add.at(by_category, (key_index, column), cents)
+
+    series = np.vstack([totals, by_category])
+    slope, intercept = linear_trend(series)
+    future_x = np.arange(span, span + months, dtype=float)
+    projected = np.clip(intercept[:, None] + slope[:, None] * future_x, 0, None)
+    averages = rolling_average(series)
+
+    history_months = _month_labels(np.arange(first, last + 1))
+    future_months = _month_labels(np.arange(last + 1, last + 1 + months))
+    income, expense = projected[0], projected[1]
+
+    return {
+        "months": months,
+        "history": [
+            {"month": m, "income": i, "expense": e, "balance": b}
+            for m, i, e, b in zip(history_months, _reais(totals[0]), _reais(totals[1]),
+                                  _reais(totals[0] - totals[1]))
+        ],
+        "rolling_average": {
+            "window": min(ROLLING_WINDOW, span),
+            "income": _reais(averages[0]), "expense": _reais(averages[1]),
+            "balance": _reais(averages[0] - averages[1]),
+        },
+        "trend": {
+            "income": {"slope": _reais(slope[0]), "intercept": _reais(intercept[0])},
+            "expense": {"slope": _reais(slope[1]), "intercept": _reais(intercept[1])},
+        },
+        "forecast": [
+            {"month": m, "income": i, "expense": e, "balance": b}
+            for m, i, e, b in zip(future_months, _reais(income), _reais(expense), _reais(income - expense))
+        ],
+        "categories": [
+            {"type": key.split("\x1f")[0], "category": key.split("\x1f")[1] or None, "forecast": values}
+            for key, values in zip(unique_keys.tolist(), _reais(projected[2:]))
+        ],
+    }
+
+
+def cached_forecast(db: Session, user_id: int, version: int, months: int) -> dict:
+    key = (user_id, version, months)
+    result = forecast_cache.get(key)
+    if result is None:
+        result = compute(db.execute(monthly_statement(user_id)).all(), months)
+        forecast_cache.set(key, result)
+    return result
@@ -1,12 +1,98 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.config import settings
+
+# Política de custo única: hashes com outro número de rounds são refeitos no login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+def _truncate(password: str) -> str:
+    # O bcrypt só considera os primeiros 72 bytes da senha
+    password_bytes = password.encode('utf-8')
+    if len(password_bytes) > 72:
+        password = password_bytes[:72].decode('utf-8', errors='ignore')
+    return password
+
+
+class PasswordHasher:
+    """Executa o bcrypt num pool próprio e limitado, fora do threadpool das rotas.
+
+    Cabem `workers` hashes em execução e `queue_size` esperando; além disso a chamada é
+    recusada na hora com 503 + Retry-After, em vez de acumular requisições presas.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, queue_size: int):
+        self.context = context
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, tente novamente em instantes",
+                headers={"Retry-After": str(settings.HASH_RETRY_AFTER_SECONDS)},
+            )
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, func, *args):
+        return self._submit(func, *args).result()
+
+    async def _run_async(self, func, *args):
+        # Espera o pool sem bloquear o event loop (rotas assíncronas)
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def hash(self, password: str) -> str:
+        return self._run(self.context.hash, _truncate(password))
+
+    def verify_and_update(self, password: str, hashed_password: str):
+        """Devolve (senha_confere, novo_hash); novo_hash vem preenchido se a política de custo mudou."""
+        try:
+            return self._run(self.context.verify_and_update, _truncate(password), hashed_password)
+        except ValueError:
+            # Hash em formato desconhecido (ex.: senha antiga gravada sem hash)
+            return False, None
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self.verify_and_update(password, hashed_password)[0]
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(self.context.hash, _truncate(password))
+
+    async def verify_and_update_async(self, password: str, hashed_password: str):
+        try:
+            return await self._run_async(self.context.verify_and_update, _truncate(password), hashed_password)
+        except ValueError:
+            return False, None
+
+
+hasher = PasswordHasher(pwd_context, settings.HASH_WORKERS, settings.HASH_QUEUE_SIZE)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class Hash:
     @staticmethod
     def bcrypt(password: str):
-        return pwd_context.hash(password)
+        return hasher.hash(password)
 
     @staticmethod
     def verify(hashed_password, plain_password):
-        return pwd_context.verify(plain_password, hashed_password)
+        return hasher.verify(plain_password, hashed_password)
+
+    @staticmethod
+    def verify_and_update(hashed_password, plain_password):
+        return hasher.verify_and_update(plain_password, hashed_password)
@@ -0,0 +1,246 @@
+"""Leitura incremental de extratos bancários (CSV ou OFX).
+
+Os parsers leem o arquivo linha a linha (CSV) ou em blocos (OFX) e produzem um item por
+transação, sem carregar o arquivo inteiro na memória. Cada item é
+(número_da_linha, dict_para_TransactionCreate) ou (número_da_linha, mensagem_de_erro).
+"""
+import codecs
+import csv
+import re
+from datetime import datetime
+from sqlalchemy import insert
+from app import models, queries, rollups, search
+
+OFX_READ_SIZE = 64 * 1024
+BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10_000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ("csv", "ofx")
+
+# Cabeçalhos aceitos no CSV -> campo de TransactionCreate
+CSV_COLUMNS = {
+    "description": "description", "descricao": "description", "descrição": "description",
+    "historico": "description", "histórico": "description", "memo": "description",
+    "amount": "amount", "valor": "amount",
+    "type": "type", "tipo": "type",
+    "category": "category", "categoria": "category",
+    "date": "date", "data": "date",
+}
+
+TYPE_ALIASES = {
+    "income": "income", "receita": "income", "entrada": "income", "credito": "income", "crédito": "income",
+    "expense": "expense", "despesa": "expense", "saida": "expense", "saída": "expense",
+    "debito": "expense", "débito": "expense",
+}
+
+_BR_DATE = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+_OFX_BLOCK = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+# Cabeçalho SGML do OFX 1.x (ENCODING:USASCII + CHARSET:1252 nos bancos brasileiros) e
+# declaração XML do OFX 2.x
+_OFX_HEADER_ENCODING = re.compile(rb"^\s*ENCODING:\s*([\w-]+)", re.IGNORECASE | re.MULTILINE)
+_OFX_HEADER_CHARSET = re.compile(rb"^\s*CHARSET:\s*([\w-]+)", re.IGNORECASE | re.MULTILINE)
+_XML_ENCODING = re.compile(rb"<\?xml[^>]*encoding=[\"']([\w.-]+)", re.IGNORECASE)
+OFX_CHARSETS = {"1252": "cp1252", "ISO-8859-1": "latin-1", "8859-1": "latin-1"}
+
+
+def parse_amount(value: str, thousands: bool = True) -> float:
+    """Aceita "1234.56", "1234,56", "1.234,56", "1,234.56" e "1.234.567".
+
+    O último separador é o decimal e o outro, o de milhar (grupos de 3 dígitos). Um único
+    separador seguido de exatamente 3 dígitos ("1.234", "1,234") é ambíguo: ValueError em
+    vez de adivinhar. Com thousands=False (OFX, que não agrupa milhares) é sempre o decimal.
+    """
+    value = value.strip().replace(" ", "").replace("R$", "")
+    sign = value[0] if value[:1] in ("+", "-") else ""
+    digits = value[len(sign):]
+    separators = [c for c in digits if c in ".,"]
+    if not separators:
+        return float(value)
+    if not thousands:
+        if len(separators) > 1:
+            raise ValueError(f"valor inválido {value!r}")
+        return float(sign + digits.replace(",", "."))
+
+    last = separators[-1]
+    if len(set(separators)) == 1 and len(separators) > 1:
+        integer, fraction, group = digits, "", last  # "1.234.567": só milhares
+    else:
+        integer, _, fraction = digits.rpartition(last)
+        group = "," if last == "." else "."
+        if last in integer:
+            raise ValueError(f"valor inválido {value!r}")
+        if group not in integer and len(fraction) == 3 and 0 < len(integer.lstrip("0")) <= 3:
+            raise ValueError(f"valor ambíguo {value!r}: use 1.234,00 ou 1,234.00")
+    groups = integer.split(group)
+    if len(groups) > 1 and not (1 <= len(groups[0]) <= 3 and all(len(g) == 3 for g in groups[1:])):
+        raise ValueError(f"valor inválido {value!r}")
+    return float(f"{sign}{''.join(groups)}.{fraction or 0}")
+
+
+def parse_date(value: str) -> str:
+    value = value.strip()
+    match = _BR_DATE.match(value)
+    if match:
+        day, month, year = match.groups()
+        return f"{year}-{month}-{day}"
+    return value
+
+
+def _to_item(fields: dict, thousands: bool = True) -> dict:
+    """Normaliza valor, tipo e data; sem coluna de tipo, o sinal do valor decide."""
+    item = {key: value for key, value in fields.items() if value not in (None, "")}
+    amount = parse_amount(item["amount"], thousands) if "amount" in item else None
+
+    if "type" in item:
+        item["type"] = TYPE_ALIASES.get(item["type"].strip().lower(), item["type"])
+    elif amount is not None:
+        item["type"] = "expense" if amount < 0 else "income"
+
+    if amount is not None:
+        item["amount"] = abs(amount)
+    if "date" in item:
+        item["date"] = parse_date(item["date"])
+    return item
+
+
+def iter_csv(text_stream):
+    header_line = text_stream.readline()
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+    columns = [CSV_COLUMNS.get(name.strip().lower()) for name in header]
+    if "description" not in columns or "amount" not in columns:
+        yield 1, "Cabeçalho precisa ter ao menos as colunas de descrição e valor"
+        return
+
+    reader = csv.reader(text_stream, delimiter=delimiter)
+    for row in reader:
+        line = reader.line_num + 1
+        if not any(cell.strip() for cell in row):
+            continue
+        fields = {column: cell.strip() for column, cell in zip(columns, row) if column}
+        try:
+            yield line, _to_item(fields)
+        except (KeyError, ValueError) as exc:
+            yield line, f"Linha inválida: {exc}"
+
+
+def iter_ofx(text_stream):
+    """Percorre os blocos <STMTTRN> do OFX (SGML ou XML) lendo o arquivo em pedaços.
+
+    No OFX a posição informada nos erros é o número da transação no arquivo, não a linha.
+    """
+    buffer, position = "", 0
+    while True:
+        chunk = text_stream.read(OFX_READ_SIZE)
+        buffer += chunk
+        last_end = 0
+        for match in _OFX_BLOCK.finditer(buffer):
+            position += 1
+            last_end = match.end()
+            fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(match.group(1))}
+            try:
+                yield position, _to_item({
+                    "description": fields.get("NAME") or fields.get("MEMO"),
+                    "amount": fields["TRNAMT"],
+                    "date": _ofx_date(fields["DTPOSTED"]),
+                }, thousands=False)
+            except (KeyError, ValueError) as exc:
+                yield position, f"Transação OFX inválida: {exc}"
+        if not chunk:
+            break
+        # Guarda só o que vem depois do último bloco completo (o próximo pode estar pela metade)
+        buffer = buffer[last_end:]
+        start = buffer.upper().find("<STMTTRN>")
+        buffer = buffer[start:] if start >= 0 else buffer[-len("<STMTTRN>"):]
+
+
+def _ofx_date(value: str) -> str:
+    # DTPOSTED vem como AAAAMMDD[HHMMSS[.XXX][TZ]]
+    return f"{value[0:4]}-{value[4:6]}-{value[6:8]}"
+
+
+def _declared_ofx_encoding(head: bytes) -> str | None:
+    encoding = _OFX_HEADER_ENCODING.search(head)
+    if encoding and encoding.group(1).decode().upper() in ("UTF-8", "UNICODE"):
+        return "utf-8-sig"
+    charset = _OFX_HEADER_CHARSET.search(head)
+    if charset and charset.group(1).decode().upper() in OFX_CHARSETS:
+        return OFX_CHARSETS[charset.group(1).decode().upper()]
+    declared = _XML_ENCODING.search(head)
+    if declared:
+        try:
+            return codecs.lookup(declared.group(1).decode()).name
+        except LookupError:
+            pass
+    return None
+
+
+def detect_encoding(binary, format: str) -> str:
+    """Codificação do arquivo enviado; o stream volta para o início.
+
+    OFX: a declarada no cabeçalho (CHARSET/ENCODING ou <?xml encoding>). Sem declaração,
+    UTF-8 se o arquivo inteiro for UTF-8 válido (verificado em blocos, sem guardar o texto)
+    e, se não for, Windows-1252, o padrão das planilhas e extratos exportados no Windows.
+    """
+    try:
+        if format == "ofx":
+            declared = _declared_ofx_encoding(binary.read(OFX_READ_SIZE))
+            if declared:
+                return declared
+            binary.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for chunk in iter(lambda: binary.read(OFX_READ_SIZE), b""):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "cp1252"
+        return "utf-8-sig"  # utf-8-sig descarta o BOM que planilhas costumam gravar no início do CSV
+    finally:
+        binary.seek(0)
+
+
+def detect_format(filename: str | None) -> str:
+    return "ofx" if (filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+
+
+def iter_statement(text_stream, format: str):
+    return iter_ofx(text_stream) if format == "ofx" else iter_csv(text_stream)
+
+
+def import_statement(db, user_id: int, items, batch_size: int) -> dict:
+    """Valida e insere as transações em lotes de `batch_size`, com um commit por lote.
+
+    Lotes já gravados permanecem mesmo que um lote seguinte falhe; as linhas inválidas não
+    interrompem a importação e aparecem no relatório (limitado a MAX_REPORTED_ERRORS).
+    """
+    now = datetime.utcnow()
+    imported, failed, errors, batch = 0, 0, [], []
+
+    def flush():
+        ids = db.scalars(insert(models.Transaction).returning(models.Transaction.id), batch).all()
+        rollups.apply_transactions(db, user_id, batch)
+        search.index_transactions(db, ids)
+        db.execute(queries.bump_data_version_statement(user_id))
+        db.commit()
+        batch.clear()
+
+    for line, item in items:
+        detail = item if isinstance(item, str) else None
+        if detail is None:
+            row, detail = queries.validate_transaction(item, user_id, now)
+        if detail is not None:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "detail": detail})
+            continue
+        batch.append(row)
+        imported += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return {"imported": imported, "failed": failed, "errors": errors}
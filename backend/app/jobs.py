@@ -0,0 +1,362 @@
+"""Tarefas em segundo plano: exportações grandes, relatórios e reconstrução dos agregados.
+
+A rota só valida e grava a tarefa na tabela jobs (status "queued") e responde na hora; o
+trabalho roda em JOB_WORKERS threads do próprio processo, cada uma com sua sessão, então
+uma exportação de anos não prende um worker HTTP nem esbarra no timeout do proxy.
+
+A tabela é a fila. Um worker "pega" a tarefa com um UPDATE condicionado ao status (só um
+vence, mesmo com vários processos) e, a cada bloco processado, grava progresso e
+heartbeat_at no mesmo UPDATE. Esse UPDATE também é o ponto de cancelamento: se a tarefa
+deixou de estar "running" (POST /jobs/{id}/cancel), o worker para e descarta o arquivo.
+
+Reinício: num desligamento normal as tarefas em andamento voltam para "queued" no próximo
+bloco, sem gastar tentativa; se o processo morrer, a tarefa fica sem heartbeat e, passados
+JOB_STALE_SECONDS, qualquer worker a pega de novo (até JOB_MAX_ATTEMPTS tentativas). O
+número da tentativa (attempts) entra em todo UPDATE do worker: se outro worker retomou a
+tarefa, o antigo para no próximo bloco e nada do que ele grava vale.
+
+O resultado vai para um arquivo em JOB_RESULTS_DIR, baixado em GET /jobs/{id}/result.
+Tarefas finalizadas e seus arquivos são apagados depois de JOB_RESULTS_RETENTION_HOURS.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func, or_, select, update
+from app import database, export, models, queries, rollups
+from app.config import settings
+
+logger = logging.getLogger("moneytrack.jobs")
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """A tarefa foi cancelada enquanto rodava."""
+
+
+class JobInterrupted(Exception):
+    """O runner está parando: a tarefa volta para a fila."""
+
+
+# =====================
+# TIPOS DE TAREFA
+# =====================
+
+def _allowed(params: dict, names) -> dict:
+    unknown = set(params) - set(names)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+    return {name: params[name] for name in names if params.get(name) is not None}
+
+
+def _check_type(params: dict):
+    if params.get("type") not in (None, *queries.TRANSACTION_TYPES):
+        raise HTTPException(status_code=400, detail="type deve ser income ou expense")
+
+
+def validate_export(params: dict) -> dict:
+    params = _allowed(params, ("format", "start_date", "end_date", "type", "category"))
+    params.setdefault("format", "csv")
+    if params["format"] not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format deve ser um de: {', '.join(export.FORMATS)}")
+    _check_type(params)
+    return params
+
+
+def run_export(db, user_id: int, params: dict, context, out):
+    filters = {name: value for name, value in params.items() if name != "format"}
+    result = db.execute(export.export_statement(queries.filter_conditions(user_id, **filters)))
+    for chunk in export.stream(result, params["format"]):
+        out.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        context.checkpoint()
+    media_type, extension = export.FORMATS[params["format"]]
+    return media_type, f"transacoes.{extension}"
+
+
+def validate_report(params: dict) -> dict:
+    params = _allowed(params, ("group_by", "type", "category", "start_date", "end_date"))
+    params.setdefault("group_by", "month")
+    queries.parse_report_groups(params["group_by"])
+    _check_type(params)
+    return params
+
+
+def run_report(db, user_id: int, params: dict, context, out):
+    groups = queries.parse_report_groups(params["group_by"])
+    filters = {name: value for name, value in params.items() if name != "group_by"}
+    statement = queries.report_statement(db.get_bind().dialect.name, user_id, groups, **filters)
+    report = queries.report_result(db.execute(statement).all(), groups)
+    context.checkpoint()
+    out.write(orjson.dumps(report))
+    return "application/json", "relatorio.json"
+
+
+def validate_rollups(params: dict) -> dict:
+    return _allowed(params, ())
+
+
+def run_rollups(db, user_id: int, params: dict, context, out):
+    divergences = rollups.check(db, user_id)
+    context.checkpoint()
+    rollups.rebuild(db, user_id)
+    db.execute(queries.bump_data_version_statement(user_id))
+    db.commit()
+    out.write(orjson.dumps({"divergences": len(divergences)}))
+    return "application/json", "agregados.json"
+
+
+# tipo -> (validação dos parâmetros na criação, execução no worker)
+KINDS = {
+    "export": (validate_export, run_export),
+    "report": (validate_report, run_report),
+    "rollups": (validate_rollups, run_rollups),
+}
+
+
+# Conta apagada: as tarefas vão junto (uma em andamento para no próximo checkpoint)
+
+def user_results_statement(user_id: int):
+    return select(models.Job.result_file).where(models.Job.user_id == user_id, models.Job.result_file.is_not(None))
+
+
+def delete_user_jobs_statement(user_id: int):
+    return delete(models.Job).where(models.Job.user_id == user_id)
+
+
+# =====================
+# EXECUÇÃO
+# =====================
+
+class JobContext:
+    """Entregue a cada tarefa: `checkpoint()` registra progresso e verifica cancelamento."""
+
+    def __init__(self, runner: "JobRunner", job_id: int, attempt: int):
+        self.runner = runner
+        self.job_id = job_id
+        self.attempt = attempt
+        self.progress = 0
+
+    def checkpoint(self):
+        if self.runner.stopping:
+            raise JobInterrupted
+        self.progress += 1
+        job = models.Job
+        with self.runner.session_factory() as db:
+            alive = db.execute(
+                update(job)
+                .where(job.id == self.job_id, job.status == "running", job.attempts == self.attempt)
+                .values(progress=self.progress, heartbeat_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+        if not alive:
+            raise JobCancelled
+
+
+class JobRunner:
+    """Fila de tarefas limitada (`queue_size` esperando) com `workers` threads executando."""
+
+    def __init__(self, workers: int, queue_size: int, results_dir: str, session_factory=None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.results_dir = results_dir
+        self.session_factory = session_factory or database.SessionLocal
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._next_cleanup = 0.0
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            os.makedirs(self.results_dir, exist_ok=True)
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._loop, name=f"jobs-{i}", daemon=True) for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float | None = None):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stop.set()
+        self._notify()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _notify(self):
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def result_path(self, job: models.Job) -> str:
+        return os.path.join(self.results_dir, job.result_file)
+
+    def remove_results(self, files):
+        for name in files:
+            try:
+                os.remove(os.path.join(self.results_dir, name))
+            except FileNotFoundError:
+                pass
+
+    # Chamados pelas rotas
+
+    def submit(self, db, user_id: int, kind: str, params: dict) -> models.Job:
+        if kind not in KINDS:
+            raise HTTPException(status_code=400, detail=f"kind deve ser um de: {', '.join(KINDS)}")
+        validate, _ = KINDS[kind]
+        params = validate(params)
+
+        queued = db.scalar(select(func.count()).select_from(models.Job).where(models.Job.status == "queued"))
+        if queued >= self.queue_size:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Fila de tarefas cheia, tente novamente em instantes",
+                headers={"Retry-After": str(settings.JOB_RETRY_AFTER_SECONDS)},
+            )
+
+        job = models.Job(user_id=user_id, kind=kind, params=params, status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self.start()
+        self._notify()
+        return job
+
+    def cancel(self, db, job: models.Job) -> models.Job:
+        cancelled = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job.id, models.Job.status.in_(("queued", "running")))
+            .values(status="cancelled", finished_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        db.refresh(job)
+        if not cancelled:
+            raise HTTPException(status_code=409, detail=f"Tarefa já finalizada ({job.status})")
+        return job
+
+    # Workers
+
+    def _claimable(self, now: datetime):
+        job = models.Job
+        stale = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        return or_(job.status == "queued", and_(job.status == "running", job.heartbeat_at < stale))
+
+    def _claim(self) -> tuple[int, int] | None:
+        """Marca a próxima tarefa como "running" para este worker: (id, tentativa) ou None."""
+        job = models.Job
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            candidates = db.execute(
+                select(job.id, job.attempts).where(self._claimable(now)).order_by(job.id).limit(self.workers + 1)
+            ).all()
+            for job_id, attempts in candidates:
+                claimed = db.execute(
+                    update(job)
+                    .where(job.id == job_id, job.attempts == attempts, self._claimable(now))
+                    .values(status="running", started_at=now, heartbeat_at=now, attempts=attempts + 1)
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id, attempts + 1
+        return None
+
+    def cleanup(self, now: datetime | None = None):
+        """Apaga tarefas finalizadas há mais de JOB_RESULTS_RETENTION_HOURS e os arquivos delas.
+
+        Só saem os arquivos das tarefas apagadas (nenhuma tarefa que fica perde o resultado),
+        mais os .part antigos, sobras de processos que morreram no meio de uma tarefa.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=settings.JOB_RESULTS_RETENTION_HOURS)
+        job = models.Job
+        with self.session_factory() as db:
+            expired = db.execute(
+                select(job.id, job.result_file).where(job.status.in_(FINISHED), job.finished_at < cutoff)
+            ).all()
+            db.execute(delete(job).where(job.id.in_([job_id for job_id, _ in expired])))
+            db.commit()
+        self.remove_results(name for _, name in expired if name)
+
+        limit = time.time() - (datetime.utcnow() - cutoff).total_seconds()
+        with os.scandir(self.results_dir) as entries:
+            partial = [e.name for e in entries if e.name.endswith(".part") and e.stat().st_mtime < limit]
+        self.remove_results(partial)
+
+    def _cleanup_due(self) -> bool:
+        with self._lock:
+            if time.monotonic() < self._next_cleanup:
+                return False
+            self._next_cleanup = time.monotonic() + settings.JOB_CLEANUP_INTERVAL_SECONDS
+            return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self._claim()
+                if claimed is None and self._cleanup_due():
+                    self.cleanup()
+            except Exception:
+                logger.exception("Falha ao buscar a próxima tarefa")
+                claimed = None
+            if claimed is None:
+                with self._wakeup:
+                    self._wakeup.wait(settings.JOB_POLL_SECONDS)
+                continue
+            self._run(*claimed)
+
+    def _run(self, job_id: int, attempt: int):
+        with self.session_factory() as db:
+            job = db.get(models.Job, job_id)
+            # Um arquivo por tentativa: um worker antigo, já substituído, não mexe no do atual
+            path = os.path.join(self.results_dir, f"{job_id}-{attempt}.result")
+            partial = path + ".part"
+            values = {}
+            try:
+                if job is None:
+                    return
+                if attempt > settings.JOB_MAX_ATTEMPTS:
+                    raise RuntimeError(f"Tarefa interrompida {attempt - 1} vezes")
+                _, run = KINDS[job.kind]
+                context = JobContext(self, job_id, attempt)
+                with open(partial, "wb") as out:
+                    media_type, filename = run(db, job.user_id, dict(job.params), context, out)
+                os.replace(partial, path)
+                values = {"status": "done", "result_file": os.path.basename(path),
+                          "media_type": media_type, "filename": filename}
+            except JobCancelled:
+                return
+            except JobInterrupted:
+                # Desligamento normal: volta para a fila sem contar como tentativa
+                values = {"status": "queued", "started_at": None, "heartbeat_at": None, "attempts": attempt - 1}
+            except Exception as exc:
+                logger.exception("Tarefa %s (%s) falhou", job_id, job.kind)
+                values = {"status": "failed", "error": str(exc)[:255] or type(exc).__name__}
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+
+            db.rollback()
+            if values["status"] != "queued":
+                values["finished_at"] = datetime.utcnow()
+            job = models.Job
+            saved = db.execute(
+                update(job)
+                .where(job.id == job_id, job.status == "running", job.attempts == attempt)
+                .values(**values)
+            ).rowcount
+            db.commit()
+            # Cancelada (ou retomada por outro worker) entre o fim do trabalho e o registro
+            if not saved and values["status"] == "done":
+                os.remove(path)
+
+
+runner = JobRunner(settings.JOB_WORKERS, settings.JOB_QUEUE_SIZE, settings.JOB_RESULTS_DIR)
@@ -1,24 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
 from app import database
 from app.database import engine
-from app import models
-from app.routes import auth, transactions, users
+from app import diagnostics, jobs, metrics, migrations
+from app.config import settings
+from app.routes import auth, health, jobs as jobs_routes, reports, transactions, users
+
+
+# Na subida: prepara o banco (se o app.serve ainda não o fez) e liga os workers das tarefas
+# em segundo plano, retomando o que ficou na fila; ao desligar, as tarefas em andamento
+# voltam para a fila
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_AUTO_MIGRATE:
+        migrations.init_db(database.engine)
+    jobs.runner.start()
+    yield
+    jobs.runner.stop(timeout=10)
+
 
 # Cria o app principal do FastAPI
 app = FastAPI(
     title="MoneyTrack API",
     description="API do sistema de controle financeiro pessoal (MoneyTrack)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# No modo assíncrono as rotas async são registradas antes e têm prioridade; o que não
+# tiver versão assíncrona continua atendido pelas rotas síncronas
+if settings.ASYNC_DB:
+    from app.routes import auth_async, transactions_async, users_async
+    app.include_router(transactions_async.router)
+    app.include_router(users_async.router)
+    app.include_router(auth_async.router)
+
 app.include_router(transactions.router)
 app.include_router(users.router)
 app.include_router(auth.router)
-models.Base.metadata.create_all(bind=database.engine)
+app.include_router(reports.router)
+app.include_router(jobs_routes.router)
+app.include_router(health.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,21 +53,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
+# Registrado por último para ser o mais externo: mede também o tempo do CORS.
+# O diagnóstico de SQL também depende dele para saber a rota de cada query.
+if settings.METRICS_ENABLED or settings.DIAGNOSTICS:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+if settings.DIAGNOSTICS:
+    diagnostics.enable()
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+    def get_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # 🔹 Rota inicial (teste rápido da API)
 @app.get("/")
 def root():
     return {"message": "🚀 MoneyTrack API online e funcionando!"}
 
 if __name__ == "__main__":
-    import uvicorn
-    import os
-
-    port = int(os.environ.get("PORT", 10000))  # Usa a porta que o Render fornecer
+    from app import serve
 
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=port
-    )
\ No newline at end of file
+    serve.main()
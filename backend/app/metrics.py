@@ -0,0 +1,205 @@
+"""Métricas da API no formato texto do Prometheus (GET /metrics).
+
+O MetricsMiddleware (ASGI puro, sem BaseHTTPMiddleware) mede a latência de cada requisição
+por rota e o número de requisições em andamento. Os eventos do SQLAlchemy, registrados
+na classe Engine (valem para todos os engines, inclusive os assíncronos), somam as queries
+e o tempo de banco na requisição corrente através de um ContextVar.
+
+Com SERVER_TIMING ligado a resposta traz o cabeçalho Server-Timing (app e db) para depuração.
+
+Os valores são do processo: com vários workers (app.serve) cada um conta só as requisições
+que atendeu, e o scrape cai em um worker qualquer. Por isso toda série leva o rótulo `pid`;
+some por processo no Prometheus (ex.: sum without (pid) (rate(...))) em vez de ler a série crua.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "db_time", "shapes")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = None  # usado pelo app.diagnostics (statement -> execuções)
+
+
+# Objeto mutável: as rotas síncronas rodam numa cópia do contexto (threadpool), mas
+# alteram a mesma instância que o middleware lê no final da requisição
+current_request: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [contagem por bucket..., soma, total]
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{{{_labels(self.labels, k)}}} {v}" for k, v in items]
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount: int):
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name}{{{_labels((), ())}}} {self.value}"]
+
+
+def _labels(names, values) -> str:
+    # pid lido na hora: cada worker do prefork tem o seu
+    names, values = (*names, "pid"), (*values, os.getpid())
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUEST_LABELS = ("method", "route", "status")
+
+requests_in_flight = Gauge("moneytrack_http_requests_in_flight", "Requisições HTTP em andamento")
+request_duration = Histogram(
+    "moneytrack_http_request_duration_seconds", "Latência das requisições HTTP", REQUEST_LABELS, LATENCY_BUCKETS
+)
+db_queries_per_request = Histogram(
+    "moneytrack_db_queries_per_request", "Queries SQL por requisição", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_queries = Counter("moneytrack_db_queries_total", "Queries SQL executadas", ("method", "route"))
+db_seconds = Counter("moneytrack_db_seconds_total", "Tempo gasto no banco", ("method", "route"))
+
+REGISTRY = (requests_in_flight, request_duration, db_queries_per_request, db_queries, db_seconds)
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# =====================
+# EVENTOS DO SQLALCHEMY
+# =====================
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.queries += 1
+    stats.db_time += time.perf_counter() - starts.pop()
+
+
+# =====================
+# MIDDLEWARE
+# =====================
+
+def route_template(scope) -> str:
+    """Caminho declarado da rota (ex.: /transactions/{transaction_id}), para não explodir a cardinalidade."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, server_timing: bool | None = None):
+        self.app = app
+        self.server_timing = settings.SERVER_TIMING if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    timing = (
+                        f'app;dur={elapsed_ms:.1f}, '
+                        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+                    )
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        requests_in_flight.add(1)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.add(-1)
+            current_request.reset(token)
+            route = route_template(scope)
+            method = scope["method"]
+            request_duration.observe((method, route, status), time.perf_counter() - start)
+            db_queries_per_request.observe((method, route), stats.queries)
+            db_queries.inc((method, route), stats.queries)
+            db_seconds.inc((method, route), stats.db_time)
@@ -0,0 +1,185 @@
+"""Migrações de esquema versionadas.
+
+`Base.metadata.create_all` só cria tabelas que ainda não existem; ele nunca altera um
+banco já existente (ex.: um moneytrack.db antigo). Cada migração abaixo tem um número de
+versão, roda na sua própria transação e fica registrada na tabela `schema_version`.
+As migrações devem ser idempotentes, pois um banco recém-criado pelo `create_all` já
+está no esquema mais novo.
+
+Uso: python -m app.migrations
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from app import database, models, rollups, search
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+@migration(1, "Índices compostos da tabela transactions")
+def add_transaction_indexes(conn):
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(models.Transaction.__tablename__)}
+    for index in models.Transaction.__table__.indexes:
+        if index.name not in existing:
+            index.create(conn)
+
+
+def _backfill_cents(conn, source: str):
+    """amount -> amount_cents com o mesmo arredondamento do app (models.to_cents).
+
+    Em Python e não com ROUND(amount * 100) no SQL: em float, 1.005 * 100 dá 100.49999...
+    """
+    update_cents = text("UPDATE transactions SET amount_cents = :cents WHERE id = :id")
+    rows = conn.execute(text(f"SELECT id, amount FROM {source}"))
+    for batch in rows.partitions(1000):
+        conn.execute(update_cents, [{"id": id, "cents": models.to_cents(amount)} for id, amount in batch])
+
+
+@migration(2, "Valores das transações em centavos (amount -> amount_cents)")
+def store_amounts_in_cents(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns(models.Transaction.__tablename__)}
+    if "amount" not in columns:
+        return
+
+    if conn.dialect.name == "sqlite":
+        # O SQLite não altera o tipo de uma coluna: recria a tabela e copia os dados convertidos
+        for index in inspect(conn).get_indexes("transactions"):
+            conn.exec_driver_sql(f"DROP INDEX {index['name']}")
+        conn.exec_driver_sql("ALTER TABLE transactions RENAME TO _transactions_old")
+        models.Transaction.__table__.create(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO transactions (id, description, amount_cents, type, date, created_at, user_id, category) "
+            "SELECT id, description, 0, type, date, created_at, user_id, category FROM _transactions_old"
+        )
+        _backfill_cents(conn, "_transactions_old")
+        conn.exec_driver_sql("DROP TABLE _transactions_old")
+    else:
+        conn.exec_driver_sql("ALTER TABLE transactions ADD COLUMN amount_cents BIGINT")
+        _backfill_cents(conn, "transactions")
+        if conn.dialect.name == "mysql":
+            conn.exec_driver_sql("ALTER TABLE transactions MODIFY amount_cents BIGINT NOT NULL")
+        else:
+            conn.exec_driver_sql("ALTER TABLE transactions ALTER COLUMN amount_cents SET NOT NULL")
+        conn.exec_driver_sql("ALTER TABLE transactions DROP COLUMN amount")
+
+
+@migration(3, "Tabela monthly_rollups calculada a partir de transactions")
+def build_monthly_rollups(conn):
+    models.MonthlyRollup.__table__.create(conn, checkfirst=True)
+    with Session(bind=conn) as db:
+        rollups.rebuild(db)
+
+
+@migration(4, "Versão dos dados por usuário (users.data_version)")
+def add_user_data_version(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns(models.User.__tablename__)}
+    if "data_version" not in columns:
+        conn.exec_driver_sql("ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(5, "Índice de busca textual em transactions (FTS5 / tsvector)")
+def add_transaction_search_index(conn):
+    search.install(conn)
+
+
+@migration(6, "Tabela jobs (tarefas em segundo plano)")
+def add_jobs_table(conn):
+    models.Job.__table__.create(conn, checkfirst=True)
+
+
+@migration(7, "Tabela used_refresh_tokens (refresh token de uso único)")
+def add_used_refresh_tokens_table(conn):
+    models.UsedRefreshToken.__table__.create(conn, checkfirst=True)
+
+
+@migration(8, "Índice de busca textual particionado por usuário (user_id no FTS5)")
+def partition_transaction_search_index(conn):
+    search.install(conn)
+
+
+@migration(9, "users com AUTOINCREMENT no SQLite (id de conta apagada não é reaproveitado)")
+def autoincrement_user_ids(conn):
+    if conn.dialect.name != "sqlite":
+        return  # SERIAL/IDENTITY e AUTO_INCREMENT nunca reaproveitam ids
+    ddl = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'users'").scalar()
+    if "AUTOINCREMENT" in ddl.upper():
+        return
+
+    # O SQLite não muda a chave de uma tabela: cria a nova ao lado, copia e troca os nomes
+    existing = {c["name"] for c in inspect(conn).get_columns("users")}
+    columns = ", ".join(c.name for c in models.User.__table__.columns if c.name in existing)
+    for index in inspect(conn).get_indexes("users"):
+        conn.exec_driver_sql(f"DROP INDEX {index['name']}")
+    conn.execute(CreateTable(models.User.__table__.to_metadata(MetaData(), name="_users_new")))
+    conn.exec_driver_sql(f"INSERT INTO _users_new ({columns}) SELECT {columns} FROM users")
+    conn.exec_driver_sql("DROP TABLE users")
+    conn.exec_driver_sql("ALTER TABLE _users_new RENAME TO users")
+    for index in models.User.__table__.indexes:
+        index.create(conn)
+
+    # Ids de contas já apagadas ainda podem aparecer nas outras tabelas: a sequência começa depois deles
+    last_id = max(
+        conn.scalar(select(func.max(column))) or 0
+        for column in (models.User.id, models.Transaction.user_id, models.MonthlyRollup.user_id, models.Job.user_id)
+    )
+    conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'users'")
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('users', :seq)"), {"seq": last_id})
+
+
+def applied_versions(conn) -> set[int]:
+    schema_version.create(conn, checkfirst=True)
+    return set(conn.scalars(select(schema_version.c.version)))
+
+
+def pending_versions(conn) -> list[int]:
+    """Migrações ainda não aplicadas, sem alterar o banco (usado na verificação de prontidão)."""
+    done = set()
+    if inspect(conn).has_table(schema_version.name):
+        done = set(conn.scalars(select(schema_version.c.version)))
+    return [version for version, _, _ in MIGRATIONS if version not in done]
+
+
+def upgrade(engine=None) -> list[int]:
+    """Aplica as migrações pendentes e devolve as versões aplicadas."""
+    engine = engine or database.engine
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            apply(conn)
+            conn.execute(schema_version.insert().values(version=version, description=description))
+        applied.append(version)
+    return applied
+
+
+def init_db(engine=None) -> list[int]:
+    """Cria as tabelas que faltam e aplica as migrações pendentes."""
+    engine = engine or database.engine
+    models.Base.metadata.create_all(bind=engine)
+    return upgrade(engine)
+
+
+if __name__ == "__main__":
+    versions = init_db()
+    print(f"Migrações aplicadas: {versions}" if versions else "Banco já está atualizado")
@@ -1,25 +1,62 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import JSON, BigInteger, Column, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from app.database import Base
 
+
+def to_cents(value) -> int:
+    """Converte um valor decimal (float, Decimal, str) para centavos inteiros."""
+    return int((Decimal(str(value)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class Money(TypeDecorator):
+    """Valor monetário guardado como inteiro em centavos e lido como Decimal.
+
+    Assim as somas (SUM) rodam sobre inteiros no banco e os totais são exatos.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-2)
+
+
 class User(Base):
     __tablename__ = "users"
+    # No SQLite sem AUTOINCREMENT o maior id volta a ser usado depois de apagado, e os tokens
+    # (que só trazem o id) da conta apagada passariam a valer para a nova
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Incrementada a cada escrita nas transações do usuário; base do ETag das rotas de leitura
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     transactions = relationship("Transaction", back_populates="user")
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # Todas as rotas filtram por user_id e ordenam/filtram por date (e, no resumo, agrupam por type)
+    __table_args__ = (
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ix_transactions_user_type_date", "user_id", "type", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String(255), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column("amount_cents", Money, nullable=False)
     type = Column(String(50), nullable=False)
     date = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -27,4 +64,53 @@ class Transaction(Base):
     category = Column(String(50), nullable=True)
 
 
-    user = relationship("User", back_populates="transactions")
\ No newline at end of file
+    user = relationship("User", back_populates="transactions")
+
+
+class MonthlyRollup(Base):
+    """Totais mensais por usuário, tipo e categoria, mantidos junto com cada escrita em transactions."""
+    __tablename__ = "monthly_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "type", "category", name="uq_monthly_rollups_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(String(7), nullable=False)  # "AAAA-MM"
+    type = Column(String(50), nullable=False)
+    category = Column(String(50), nullable=False, default="")  # "" = sem categoria (NULL não conflita no UNIQUE)
+    total = Column("total_cents", Money, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class Job(Base):
+    """Tarefa em segundo plano (app.jobs). A própria tabela é a fila: sobrevive a reinícios."""
+    __tablename__ = "jobs"
+    # Os workers buscam a próxima tarefa por status, na ordem de criação
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed, cancelled
+    progress = Column(Integer, nullable=False, default=0)  # blocos processados
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(String(255), nullable=True)
+    result_file = Column(String(255), nullable=True)  # nome do arquivo em JOB_RESULTS_DIR
+    media_type = Column(String(100), nullable=True)
+    filename = Column(String(255), nullable=True)  # nome sugerido no download
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class UsedRefreshToken(Base):
+    """Refresh token já trocado em /auth/refresh (uso único). Guardado até expirar, pelo jti."""
+    __tablename__ = "used_refresh_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
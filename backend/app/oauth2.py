@@ -1,33 +1,97 @@
-from jose import JWTError, jwt
-from datetime import datetime, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app import models, database
+from app import models, database, schemas
+from app.cache import TTLCache
+from app.config import settings
+from app.token import InvalidToken, tokens
+from datetime import datetime
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
+# Cadastro atual do usuário para as rotas que o exibem (perfil); update_user/delete_user invalidam
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
 
-def verify_token(token: str, credentials_exception):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
-        if user_id is None:
-            raise credentials_exception
-        return user_id
-    except JWTError:
-        raise credentials_exception
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    user_id = verify_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise credentials_exception
+
+
+# Autenticação das rotas: só as claims do token de acesso, sem consulta ao banco
+def get_current_user(token: str = Depends(oauth2_scheme)) -> schemas.CurrentUser:
+    try:
+        return tokens.authenticate(token)
+    except InvalidToken:
+        raise _credentials_exception()
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme)) -> schemas.CurrentUser:
+    return get_current_user(token)
+
+
+def refresh_token_claims(refresh_token: str) -> tuple[int, str, datetime, datetime]:
+    """Dono, jti, expiração e emissão de um refresh token válido (401 caso contrário)."""
+    try:
+        claims = tokens.decode(refresh_token, "refresh")
+        return (int(claims["sub"]), claims["jti"], datetime.utcfromtimestamp(claims["exp"]),
+                datetime.utcfromtimestamp(claims["iat"]))
+    except (InvalidToken, KeyError, ValueError):
+        raise _credentials_exception()
+
+
+def refresh_token_owner(user, issued_at: datetime):
+    """O usuário do `sub`, se o token foi emitido para ele (401 se a conta não existe mais).
+
+    Um token emitido antes da criação da conta era de uma conta apagada com o mesmo id.
+    """
+    created_at = user.created_at.replace(microsecond=0) if user and user.created_at else None
+    if not user or (created_at and created_at > issued_at):
+        raise _credentials_exception()
     return user
+
+
+# Refresh token de uso único: o jti trocado vai para used_refresh_tokens (no banco, para valer
+# em todos os workers); reapresentado, a chave primária recusa. Os já expirados saem junto.
+def use_refresh_token_statements(jti: str, expires_at: datetime):
+    used = models.UsedRefreshToken
+    return (
+        insert(used).values(jti=jti, expires_at=expires_at),
+        delete(used).where(used.expires_at < datetime.utcnow()),
+    )
+
+
+# Cadastro atualizado (nome e e-mail podem ter mudado depois da emissão do token), com cache
+def get_current_user_record(
+    current_user: schemas.CurrentUser = Depends(get_current_user), db: Session = Depends(database.get_db)
+):
+    cached = user_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    user = db.query(models.User).filter(models.User.id == current_user.id).first()
+    if not user:
+        raise _credentials_exception()
+    cached = schemas.CurrentUser.model_validate(user)
+    user_cache.set(current_user.id, cached)
+    return cached
+
+
+async def get_current_user_record_async(
+    current_user: schemas.CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    cached = user_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    user = await db.scalar(select(models.User).where(models.User.id == current_user.id))
+    if not user:
+        raise _credentials_exception()
+    cached = schemas.CurrentUser.model_validate(user)
+    user_cache.set(current_user.id, cached)
+    return cached
@@ -0,0 +1,267 @@
+"""Montagem das consultas de transações, compartilhada pelas rotas síncronas e assíncronas.
+
+As funções daqui só constroem statements e formatam resultados; quem executa é a rota,
+com `db.execute(...)` (Session) ou `await db.execute(...)` (AsyncSession).
+"""
+import base64
+import hashlib
+from datetime import datetime
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import func, select, tuple_, update
+from app import models, rollups, schemas
+
+TRANSACTION_TYPES = ("income", "expense")
+
+REPORT_GROUPS = ("month", "category", "type")
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# As listagens selecionam só estas colunas (na ordem de schemas.Transaction), sem montar objetos ORM
+LIST_COLUMNS = tuple(getattr(models.Transaction, field) for field in schemas.Transaction.model_fields)
+
+
+def filter_conditions(user_id: int, start_date=None, end_date=None, type=None, category=None, before=None):
+    """Monta as condições WHERE comuns às rotas de listagem, resumo e exclusão em lote."""
+    conditions = [models.Transaction.user_id == user_id]
+    if type:
+        conditions.append(models.Transaction.type == type)
+    if category:
+        conditions.append(models.Transaction.category == category)
+    if start_date:
+        conditions.append(models.Transaction.date >= start_date)
+    if end_date:
+        conditions.append(models.Transaction.date <= end_date)
+    if before:
+        conditions.append(models.Transaction.date < before)
+    return conditions
+
+
+def rollup_conditions(user_id: int, type=None, category=None):
+    """Condições equivalentes às de filter_conditions sobre a tabela monthly_rollups."""
+    conditions = [models.MonthlyRollup.user_id == user_id]
+    if type:
+        conditions.append(models.MonthlyRollup.type == type)
+    if category:
+        conditions.append(models.MonthlyRollup.category == category)
+    return conditions
+
+
+# =====================
+# VERSÃO DOS DADOS E ETAG
+# =====================
+
+def bump_data_version_statement(user_id: int):
+    """Toda escrita em transactions executa este UPDATE na mesma transação do banco."""
+    return (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(data_version=models.User.data_version + 1)
+    )
+
+
+def data_version_statement(user_id: int):
+    return select(models.User.data_version).where(models.User.id == user_id)
+
+
+def etag_for(request: Request, user_id: int, version: int) -> str:
+    """ETag de uma leitura: usuário, versão dos dados, rota e parâmetros da consulta.
+
+    Se a versão não mudou, a mesma URL devolve o mesmo conteúdo, então basta compará-la
+    com o If-None-Match para responder 304 sem executar a consulta principal.
+    """
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{params}".encode(), digest_size=8).hexdigest()
+    return f'W/"{user_id}-{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    # A comparação do If-None-Match é fraca: W/"x" e "x" são equivalentes
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def cache_headers(etag: str) -> dict:
+    # private: a resposta depende do token; no-cache: o navegador sempre revalida com o ETag
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+# =====================
+# CRIAÇÃO EM LOTE
+# =====================
+
+def validate_transaction(item: dict, user_id: int, now: datetime):
+    """Valida um item solto e devolve (linha pronta para o INSERT, None) ou (None, detalhe do erro)."""
+    try:
+        transaction = schemas.TransactionCreate.model_validate(item)
+    except ValidationError as exc:
+        return None, exc.errors(include_url=False, include_context=False)
+    if transaction.type not in TRANSACTION_TYPES:
+        return None, f"Tipo inválido: {transaction.type}"
+
+    row = transaction.model_dump()
+    row["date"] = row["date"] or now
+    row.update(user_id=user_id, created_at=now)
+    return row, None
+
+
+def validate_bulk(payload: schemas.TransactionBulkCreate, user_id: int):
+    """Valida os itens do lote e devolve (linhas, posições, erros).
+
+    No modo atômico qualquer erro recusa o lote inteiro com 422.
+    """
+    now = datetime.utcnow()
+    rows, positions, errors = [], [], []
+
+    for index, item in enumerate(payload.transactions):
+        row, detail = validate_transaction(item, user_id, now)
+        if detail is not None:
+            errors.append({"index": index, "detail": detail})
+            continue
+        rows.append(row)
+        positions.append(index)
+
+    if errors and payload.atomic:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "Nenhuma transação foi criada", "errors": errors},
+        )
+    return rows, positions, errors
+
+
+def bulk_result(payload: schemas.TransactionBulkCreate, positions, new_ids, errors) -> dict:
+    ids = [None] * len(payload.transactions)
+    for index, new_id in zip(positions, new_ids):
+        ids[index] = new_id
+    return {"ids": ids, "created": len(positions), "errors": errors}
+
+
+# =====================
+# PAGINAÇÃO POR CURSOR
+# =====================
+
+def encode_cursor(transaction: models.Transaction) -> str:
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        date, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(date), int(transaction_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def page_statement(conditions, limit: int, cursor: str | None, all_: bool):
+    """Paginação por cursor (keyset) sobre (date, id) em ordem decrescente.
+
+    O custo de cada página não depende da profundidade, ao contrário do OFFSET. Busca uma
+    linha a mais para saber se existe próxima página; all=true devolve a lista completa.
+    """
+    stmt = (
+        select(*LIST_COLUMNS)
+        .where(*conditions)
+        .order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+    )
+    if all_:
+        return stmt
+    if cursor:
+        stmt = stmt.where(tuple_(models.Transaction.date, models.Transaction.id) < decode_cursor(cursor))
+    return stmt.limit(limit + 1)
+
+
+def split_page(transactions: list, limit: int, all_: bool):
+    """Devolve (página, cursor da próxima página ou None)."""
+    if all_ or len(transactions) <= limit:
+        return transactions, None
+    transactions = transactions[:limit]
+    return transactions, encode_cursor(transactions[-1])
+
+
+# =====================
+# RESUMO E RELATÓRIO
+# =====================
+
+def summary_statement(user_id: int, start_date=None, end_date=None, category=None):
+    if start_date or end_date:
+        conditions = filter_conditions(user_id, start_date=start_date, end_date=end_date, category=category)
+        return (
+            select(models.Transaction.type, func.sum(models.Transaction.amount))
+            .where(*conditions)
+            .group_by(models.Transaction.type)
+        )
+    # Sem recorte de datas, os agregados mensais bastam: O(meses) em vez de O(transações)
+    return (
+        select(models.MonthlyRollup.type, func.sum(models.MonthlyRollup.total))
+        .where(*rollup_conditions(user_id, category=category))
+        .group_by(models.MonthlyRollup.type)
+    )
+
+
+def summary_result(rows) -> dict:
+    totals = dict(rows)
+    # Somas exatas em centavos (Decimal); a conversão para float acontece só na resposta
+    income = totals.get("income") or 0
+    expense = totals.get("expense") or 0
+    return {
+        "total_income": float(income),
+        "total_expense": float(expense),
+        "balance": float(income - expense)
+    }
+
+
+def parse_report_groups(group_by: str) -> list[str]:
+    groups = [g.strip() for g in group_by.split(",") if g.strip()]
+    invalid = [g for g in groups if g not in REPORT_GROUPS]
+    if not groups or invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by deve conter apenas: {', '.join(REPORT_GROUPS)}"
+        )
+    return groups
+
+
+def report_statement(dialect_name: str, user_id: int, groups, type=None, category=None,
+                     start_date=None, end_date=None):
+    if start_date or end_date:
+        columns = {
+            "month": rollups.month_expression(dialect_name),
+            "category": models.Transaction.category,
+            "type": models.Transaction.type,
+        }
+        total, count = func.sum(models.Transaction.amount), func.count()
+        conditions = filter_conditions(
+            user_id, start_date=start_date, end_date=end_date, type=type, category=category
+        )
+    else:
+        # Mês, categoria e tipo são a chave dos agregados mensais: não é preciso ler transactions
+        columns = {
+            "month": models.MonthlyRollup.month,
+            "category": models.MonthlyRollup.category,
+            "type": models.MonthlyRollup.type,
+        }
+        total, count = func.sum(models.MonthlyRollup.total), func.sum(models.MonthlyRollup.count)
+        conditions = rollup_conditions(user_id, type=type, category=category)
+
+    keys = [columns[g].label(g) for g in groups]
+    return (
+        select(*keys, total.label("total"), count.label("count"))
+        .where(*conditions)
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+
+
+def report_result(rows, groups) -> dict:
+    buckets = []
+    for row in rows:
+        # Nos agregados, "" representa categoria (ou data) ausente
+        bucket = {g: getattr(row, g) or None for g in groups}
+        bucket.update(total=float(row.total), count=row.count)
+        buckets.append(bucket)
+    return {"group_by": groups, "buckets": buckets}
@@ -0,0 +1,221 @@
+"""Manutenção da tabela monthly_rollups.
+
+Cada escrita em transactions (criação, edição, exclusão e rotas em lote) aplica aqui o
+delta correspondente, na mesma transação do banco. Assim o resumo e o relatório leem
+O(meses) linhas em vez de varrer todas as transações do usuário.
+
+O delta de edições e exclusões sai das linhas que o próprio UPDATE/DELETE alterou, nunca
+de uma leitura anterior sem lock: duas requisições apagando (ou editando) a mesma linha
+não descontam duas vezes, e o DELETE em lote não apaga linhas que não descontou.
+
+Uso:
+    python -m app.rollups rebuild   # recalcula tudo a partir de transactions e confere
+    python -m app.rollups check     # só confere
+"""
+import sys
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import database, models
+
+KEY_COLUMNS = ("user_id", "month", "type", "category")
+# Vezes que edição/exclusão de uma transação relê a linha alterada por outra requisição
+WRITE_RETRIES = 3
+
+
+def month_expression(dialect_name: str, column=models.Transaction.date):
+    """Expressão SQL que trunca a data no mês ("AAAA-MM") conforme o banco."""
+    if dialect_name == "postgresql":
+        return func.to_char(func.date_trunc("month", column), "YYYY-MM")
+    if dialect_name in ("mysql", "mariadb"):
+        return func.date_format(column, "%Y-%m")
+    return func.strftime("%Y-%m", column)
+
+
+def month_key(date) -> str:
+    return date.strftime("%Y-%m") if date else ""
+
+
+def _value(transaction, name):
+    return transaction[name] if isinstance(transaction, dict) else getattr(transaction, name)
+
+
+def apply_transactions(db: Session, user_id: int, transactions, sign: int = 1):
+    """Soma (sign=1) ou subtrai (sign=-1) transações (objetos ORM ou dicts) dos agregados."""
+    deltas = defaultdict(lambda: [0, 0])
+    for transaction in transactions:
+        key = (
+            month_key(_value(transaction, "date")),
+            _value(transaction, "type"),
+            _value(transaction, "category") or "",
+        )
+        deltas[key][0] += sign * models.to_cents(_value(transaction, "amount"))
+        deltas[key][1] += sign
+    _apply_deltas(db, user_id, deltas)
+
+
+def delete_matching(db: Session, user_id: int, conditions) -> int:
+    """DELETE em lote que subtrai dos agregados exatamente as linhas apagadas; devolve quantas.
+
+    Com RETURNING (SQLite, PostgreSQL, MariaDB) as linhas vêm do próprio DELETE; sem ele
+    (MySQL) são lidas antes com SELECT ... FOR UPDATE, que as trava até o commit.
+    """
+    transaction = models.Transaction
+    columns = (transaction.date, transaction.type, transaction.category, transaction.amount)
+    stmt = delete(transaction).where(*conditions)
+    if db.get_bind().dialect.delete_returning:
+        rows = db.execute(stmt.returning(*columns)).all()
+    else:
+        rows = db.execute(select(*columns).where(*conditions).with_for_update()).all()
+        db.execute(stmt)
+    apply_transactions(db, user_id, rows, sign=-1)
+    return len(rows)
+
+
+def _unchanged(transaction):
+    """Condições que só casam com a linha enquanto ela estiver como foi lida."""
+    t = models.Transaction
+    return (
+        t.id == transaction.id,
+        t.user_id == transaction.user_id,
+        t.date.is_not_distinct_from(transaction.date),
+        t.type == transaction.type,
+        t.category.is_not_distinct_from(transaction.category),
+        t.amount == transaction.amount,
+    )
+
+
+def delete_transaction(db: Session, transaction) -> bool:
+    """Apaga a transação e a subtrai dos agregados.
+
+    False (sem mexer em nada) se outra requisição a alterou ou apagou depois da leitura.
+    """
+    deleted = db.execute(delete(models.Transaction).where(*_unchanged(transaction))).rowcount
+    if deleted:
+        apply_transactions(db, transaction.user_id, [transaction], sign=-1)
+    return bool(deleted)
+
+
+def update_transaction(db: Session, transaction, changes: dict) -> bool:
+    """Aplica `changes` à transação e move o valor nos agregados; False como em delete_transaction."""
+    updated = db.execute(
+        update(models.Transaction)
+        .where(*_unchanged(transaction))
+        .values(**changes)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if updated:
+        after = {name: changes.get(name, getattr(transaction, name)) for name in ("date", "type", "category", "amount")}
+        apply_transactions(db, transaction.user_id, [transaction], sign=-1)
+        apply_transactions(db, transaction.user_id, [after])
+    return bool(updated)
+
+
+def _apply_deltas(db: Session, user_id: int, deltas):
+    values = [
+        {
+            "user_id": user_id, "month": month, "type": type, "category": category,
+            "total": Decimal(cents).scaleb(-2), "count": count,
+        }
+        for (month, type, category), (cents, count) in deltas.items()
+        if cents or count
+    ]
+    if not values:
+        return
+
+    rollup = models.MonthlyRollup
+    dialect = db.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(rollup)
+        stmt = stmt.on_duplicate_key_update(
+            total_cents=rollup.total + stmt.inserted.total_cents,
+            count=rollup.count + stmt.inserted.count,
+        )
+    else:
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(rollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={
+                "total_cents": rollup.total + stmt.excluded.total_cents,
+                "count": rollup.count + stmt.excluded.count,
+            },
+        )
+    db.execute(stmt, values)
+    db.execute(delete(rollup).where(rollup.user_id == user_id, rollup.count <= 0))
+
+
+def _raw_aggregate(db: Session, user_id: int | None = None):
+    """GROUP BY (usuário, mês, tipo, categoria) direto em transactions."""
+    month = func.coalesce(month_expression(db.get_bind().dialect.name), "")
+    category = func.coalesce(models.Transaction.category, "")
+    query = (
+        select(
+            models.Transaction.user_id, month.label("month"), models.Transaction.type, category.label("category"),
+            func.sum(models.Transaction.amount).label("total"), func.count().label("count"),
+        )
+        .where(models.Transaction.user_id.is_not(None))
+        .group_by(models.Transaction.user_id, month, models.Transaction.type, category)
+    )
+    if user_id is not None:
+        query = query.where(models.Transaction.user_id == user_id)
+    return query
+
+
+def rebuild(db: Session, user_id: int | None = None):
+    """Recalcula os agregados do zero (de um usuário ou de todos) com um INSERT ... SELECT."""
+    rollup = models.MonthlyRollup
+    purge = delete(rollup)
+    if user_id is not None:
+        purge = purge.where(rollup.user_id == user_id)
+    db.execute(purge)
+    db.execute(
+        rollup.__table__.insert().from_select(
+            ["user_id", "month", "type", "category", "total_cents", "count"],
+            _raw_aggregate(db, user_id),
+        )
+    )
+
+
+def check(db: Session, user_id: int | None = None) -> list[dict]:
+    """Compara os agregados com os dados brutos e devolve as divergências (lista vazia = ok)."""
+    expected = {
+        (row.user_id, row.month, row.type, row.category): (row.total, row.count)
+        for row in db.execute(_raw_aggregate(db, user_id))
+    }
+    rollup = models.MonthlyRollup
+    query = select(rollup)
+    if user_id is not None:
+        query = query.where(rollup.user_id == user_id)
+    stored = {
+        (r.user_id, r.month, r.type, r.category): (r.total, r.count)
+        for r in db.scalars(query)
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys(), key=str):
+        if expected.get(key) != stored.get(key):
+            mismatches.append({
+                **dict(zip(KEY_COLUMNS, key)),
+                "expected": expected.get(key),
+                "stored": stored.get(key),
+            })
+    return mismatches
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    db = database.SessionLocal()
+    try:
+        if command == "rebuild":
+            rebuild(db)
+            db.commit()
+        mismatches = check(db)
+    finally:
+        db.close()
+
+    for mismatch in mismatches:
+        print(mismatch)
+    print("Agregados conferem com as transações" if not mismatches else f"{len(mismatches)} divergência(s)")
+    sys.exit(1 if mismatches else 0)
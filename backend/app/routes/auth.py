@@ -1,44 +1,59 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app import models, schemas, database
-from passlib.context import CryptContext
-from app.token import create_access_token
+from app import hashing, models, oauth2, schemas, database
+from app.token import tokens
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def get_password_hash(password: str) -> str:
+def user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
 
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password = password_bytes[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
 
+# Rotas com bcrypt são async: a espera pelo pool do app.hashing não prende uma thread do
+# threadpool que atende as rotas síncronas. As consultas (sessão síncrona) vão para ele.
 @router.post("/register")
-def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+    existing_user = await run_in_threadpool(user_by_email, db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
-    hashed_password = get_password_hash(user.password)
-    new_user = models.User(name=user.name, email=user.email, password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_password = await hashing.hasher.hash_async(user.password)
+    db.add(models.User(name=user.name, email=user.email, password=hashed_password))
+    await run_in_threadpool(db.commit)
     return {"message": "Usuário cadastrado com sucesso"}
 
 @router.post("/login")
-def login_user(request: schemas.UserLogin, db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.email == request.email).first()
+async def login_user(request: schemas.UserLogin, db: Session = Depends(database.get_db)):
+    user = await run_in_threadpool(user_by_email, db, request.email)
     
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado") 
     
-    if not verify_password(request.password, user.password):
+    valid, new_hash = await hashing.hasher.verify_and_update_async(request.password, user.password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Senha incorreta") 
+
+    pair = tokens.issue(user)
+    # Regrava o hash quando a política de custo (BCRYPT_ROUNDS) mudou
+    if new_hash:
+        user.password = new_hash
+        await run_in_threadpool(db.commit)
     
-    access_token = create_access_token({"user_id": user.id})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return pair
+
+# Troca um refresh token válido por um par novo (o usuário precisa continuar existindo).
+# O token recebido é consumido: a segunda troca do mesmo refresh token é recusada
+@router.post("/refresh")
+def refresh_tokens(request: schemas.TokenRefresh, db: Session = Depends(database.get_db)):
+    user_id, jti, expires_at, issued_at = oauth2.refresh_token_claims(request.refresh_token)
+    user = oauth2.refresh_token_owner(db.get(models.User, user_id), issued_at)
+    try:
+        for statement in oauth2.use_refresh_token_statements(jti, expires_at):
+            db.execute(statement)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return tokens.issue(user)
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, oauth2, schemas, database
+from app.hashing import hasher
+from app.token import tokens
+
+# Versão assíncrona das rotas de auth.py (modo ASYNC_DB): o bcrypt roda no pool do
+# app.hashing e a rota espera o resultado sem bloquear o event loop
+router = APIRouter(prefix="/auth", tags=["Authentication"])
+
+get_db = database.get_async_db
+
+
+@router.post("/register")
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(models.User).where(models.User.email == user.email))
+    if existing_user:
+        raise HTTPException(status_code=400, detail="Email já cadastrado")
+    hashed_password = await hasher.hash_async(user.password)
+    new_user = models.User(name=user.name, email=user.email, password=hashed_password)
+    db.add(new_user)
+    await db.commit()
+    return {"message": "Usuário cadastrado com sucesso"}
+
+
+@router.post("/login")
+async def login_user(request: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(models.User).where(models.User.email == request.email))
+
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    valid, new_hash = await hasher.verify_and_update_async(request.password, user.password)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Senha incorreta")
+
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
+    return tokens.issue(user)
+
+
+@router.post("/refresh")
+async def refresh_tokens(request: schemas.TokenRefresh, db: AsyncSession = Depends(get_db)):
+    user_id, jti, expires_at, issued_at = oauth2.refresh_token_claims(request.refresh_token)
+    user = oauth2.refresh_token_owner(await db.get(models.User, user_id), issued_at)
+    try:
+        for statement in oauth2.use_refresh_token_statements(jti, expires_at):
+            await db.execute(statement)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return tokens.issue(user)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app import database, migrations
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+get_db = database.get_db
+
+
+# ✅ Liveness: o processo está de pé e atendendo (não toca no banco, para um banco fora do ar
+# não fazer o orquestrador reiniciar processos saudáveis)
+@router.get("/live")
+def liveness():
+    return {"status": "ok"}
+
+
+# ✅ Readiness: o banco responde e o esquema está atualizado (senão 503, fora do balanceador)
+@router.get("/ready")
+def readiness(response: Response, db: Session = Depends(get_db)):
+    try:
+        pending = migrations.pending_versions(db.connection())
+    except SQLAlchemyError:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "database": "unreachable"}
+    if pending:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "database": "ok", "pending_migrations": pending}
+    return {"status": "ok", "database": "ok"}
@@ -0,0 +1,62 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app import database, jobs, models, oauth2, schemas
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+get_db = database.get_db
+
+
+def get_user_job(job_id: int, db: Session, current_user: schemas.CurrentUser) -> models.Job:
+    job = db.get(models.Job, job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return job
+
+
+# ✅ Criar tarefa em segundo plano (exportação, relatório ou reconstrução dos agregados)
+@router.post("/", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    payload: schemas.JobCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
+):
+    return jobs.runner.submit(db, current_user.id, payload.kind, payload.params)
+
+
+# ✅ Consultar status e progresso da tarefa
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
+):
+    return get_user_job(job_id, db, current_user)
+
+
+# ✅ Baixar o resultado de uma tarefa concluída
+@router.get("/{job_id}/result")
+def get_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
+):
+    job = get_user_job(job_id, db, current_user)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Tarefa ainda sem resultado ({job.status})")
+    path = jobs.runner.result_path(job)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Resultado não está mais disponível")
+    return FileResponse(path, media_type=job.media_type, filename=job.filename)
+
+
+# ✅ Cancelar uma tarefa na fila ou em execução
+@router.post("/{job_id}/cancel", response_model=schemas.Job)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
+):
+    return jobs.runner.cancel(db, get_user_job(job_id, db, current_user))
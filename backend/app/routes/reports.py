@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from app import charts, database, oauth2, queries, schemas
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+get_db = database.get_db
+
+
+# ✅ Gráfico do relatório (pizza por categoria, barras mensais ou linha de saldo) em PNG ou SVG
+@router.get("/chart/{kind}.{format}")
+def get_chart(
+    kind: str,
+    format: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    type: str = "expense",
+    start_date: str = None,
+    end_date: str = None
+):
+    if kind not in charts.KINDS:
+        raise HTTPException(status_code=404, detail=f"Gráfico deve ser um de: {', '.join(charts.KINDS)}")
+    if format not in charts.FORMATS:
+        raise HTTPException(status_code=404, detail=f"Formato deve ser um de: {', '.join(charts.FORMATS)}")
+    if type not in queries.TRANSACTION_TYPES:
+        raise HTTPException(status_code=400, detail="type deve ser income ou expense")
+
+    params = {"start_date": start_date, "end_date": end_date}
+    if kind == "category":
+        params["type"] = type
+    version = db.scalar(queries.data_version_statement(current_user.id))
+    key = charts.cache_key(current_user.id, kind, format, params, version)
+
+    headers = queries.cache_headers(f'"{key[:32]}"')
+    if queries.etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    image = charts.chart_cache.get(key)
+    if image is None:
+        statement = queries.report_statement(
+            db.get_bind().dialect.name, current_user.id, charts.GROUPS[kind],
+            type=params.get("type"), start_date=start_date, end_date=end_date
+        )
+        buckets = queries.report_result(db.execute(statement).all(), charts.GROUPS[kind])["buckets"]
+        image = charts.renderer.render(kind, format, buckets)
+        charts.chart_cache.set(key, image)
+
+    return Response(image, media_type=charts.FORMATS[format], headers=headers)
@@ -1,6 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
-from app import models, oauth2, schemas, database
+from app import export, forecast, importer, models, oauth2, queries, rollups, schemas, search, serializers, database
+from app.config import settings
+from app.queries import MAX_PAGE_SIZE, PAGE_SIZE
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.oauth2 import get_current_user
@@ -10,45 +16,118 @@ router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 get_db = database.get_db
 
+
+# Edição/exclusão: `write` (app.rollups) só vale para a linha como foi lida; se outra
+# requisição a alterou nesse meio-tempo, relê e tenta de novo
+def _write_own_transaction(db: Session, transaction_id: int, user_id: int, write) -> models.Transaction:
+    query = (
+        db.query(models.Transaction)
+        .filter(models.Transaction.id == transaction_id, models.Transaction.user_id == user_id)
+        .populate_existing()
+    )
+    for _ in range(rollups.WRITE_RETRIES):
+        tr = query.first()
+        if not tr:
+            raise HTTPException(status_code=404, detail="Transação não encontrada")
+        if write(db, tr):
+            return tr
+    raise HTTPException(status_code=409, detail="Transação alterada por outra requisição, tente novamente")
+
 # ✅ Criar nova transação
 @router.post("/", response_model=schemas.Transaction, status_code=status.HTTP_201_CREATED)
 def create_transaction(
     transaction: schemas.TransactionCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
-    db_user = db.query(models.User).filter(models.User.id == current_user.id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
     db_transaction = models.Transaction(**transaction.model_dump(), user_id=current_user.id)
     db.add(db_transaction)
+    db.flush()
+    rollups.apply_transactions(db, current_user.id, [db_transaction])
+    search.index_transactions(db, [db_transaction.id])
+    db.execute(queries.bump_data_version_statement(current_user.id))
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
 
-# ✅ Listar todas as transações do usuário logado
+# ✅ Criar várias transações em lote (um único INSERT e um único commit)
+@router.post("/bulk", response_model=schemas.TransactionBulkResult, status_code=status.HTTP_201_CREATED)
+def create_transactions_bulk(
+    payload: schemas.TransactionBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
+):
+    rows, positions, errors = queries.validate_bulk(payload, current_user.id)
+
+    new_ids = []
+    if rows:
+        new_ids = db.scalars(
+            insert(models.Transaction).returning(models.Transaction.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        rollups.apply_transactions(db, current_user.id, rows)
+        search.index_transactions(db, new_ids)
+        db.execute(queries.bump_data_version_statement(current_user.id))
+        db.commit()
+
+    return queries.bulk_result(payload, positions, new_ids, errors)
+
+
+# ✅ Listar as transações do usuário logado (paginado por cursor)
 @router.get("/", response_model=list[schemas.Transaction])
 def get_transactions(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
     start_date: str = None,
     end_date: str = None,
-    type: str = None
+    type: str = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+    all_: bool = Query(False, alias="all")
 ):
-    query = db.query(models.Transaction).filter(models.Transaction.user_id == current_user.id)
-    
-    if type:
-        query = query.filter(models.Transaction.type == type)
-    if start_date:
-        query = query.filter(models.Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(models.Transaction.date <= end_date)
+    etag = queries.etag_for(request, current_user.id, db.scalar(queries.data_version_statement(current_user.id)))
+    if queries.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=queries.cache_headers(etag))
+    response.headers.update(queries.cache_headers(etag))
+
+    conditions = queries.filter_conditions(current_user.id, start_date=start_date, end_date=end_date, type=type)
+    transactions = db.execute(queries.page_statement(conditions, limit, cursor, all_)).all()
+    transactions, next_cursor = queries.split_page(transactions, limit, all_)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if settings.FAST_JSON:
+        return serializers.transactions_response(transactions, response)
+    return transactions
 
-    return query.order_by(models.Transaction.date.desc()).all()
 
 
+# ✅ Apagar em lote as transações do usuário logado que casam com os filtros
+@router.delete("/", response_model=schemas.TransactionBulkDeleteResult)
+def delete_transactions(
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    before: datetime = None,
+    type: str = None,
+    category: str = None,
+    dry_run: bool = False
+):
+    if before is None and type is None and category is None:
+        raise HTTPException(status_code=400, detail="Informe ao menos um filtro (before, type ou category)")
+
+    conditions = queries.filter_conditions(current_user.id, type=type, category=category, before=before)
+
+    if dry_run:
+        count = db.scalar(select(func.count()).select_from(models.Transaction).where(*conditions))
+        return {"deleted": count, "dry_run": True}
+
+    deleted = rollups.delete_matching(db, current_user.id, conditions)
+    db.execute(queries.bump_data_version_statement(current_user.id))
+    db.commit()
+    return {"deleted": deleted}
+
 
 # ✅ Filtrar transações por ID de usuário (rota administrativa)
 @router.get("/user/{user_id}", response_model=list[schemas.Transaction])
@@ -61,49 +140,150 @@ def get_transactions_by_user(user_id: int, db: Session = Depends(get_db)):
     return transactions
 
 
-#Obter resumo financeiro (entradas, saídas, saldo)
-@router.get("/summary", response_model=dict)
-def get_summary(db: Session = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
-    transactions = db.query(models.Transaction).filter(models.Transaction.user_id == current_user.id).all()
-    income = sum(t.amount for t in transactions if t.type == "income")
-    expense = sum(t.amount for t in transactions if t.type == "expense")
-    balance = income - expense
-    
-    return {
-        "total_income": income, 
-        "total_expense": expense, 
-        "balance": balance
-    }
-
-    
+# ✅ Obter resumo financeiro (entradas, saídas, saldo) com uma única agregação no banco
 @router.get("/summary", response_model=dict)
-def get_summary(db: Session = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
-    transactions = db.query(models.Transaction).filter(models.Transaction.user_id == current_user.id).all()
-    income = sum(t.amount for t in transactions if t.type == "income")
-    expense = sum(t.amount for t in transactions if t.type == "expense")
-    balance = income - expense
-    return {"income": income, "expense": expense, "balance": balance}
+def get_summary(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    start_date: str = None,
+    end_date: str = None,
+    category: str = None
+):
+    etag = queries.etag_for(request, current_user.id, db.scalar(queries.data_version_statement(current_user.id)))
+    if queries.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=queries.cache_headers(etag))
+    response.headers.update(queries.cache_headers(etag))
+
+    statement = queries.summary_statement(current_user.id, start_date=start_date, end_date=end_date, category=category)
+    return queries.summary_result(db.execute(statement).all())
+
+# ✅ Relatório agregado (por mês, categoria e/ou tipo) calculado com GROUP BY no banco
+@router.get("/report", response_model=dict)
+def get_report(
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    group_by: str = "month",
+    type: str = None,
+    category: str = None,
+    start_date: str = None,
+    end_date: str = None
+):
+    groups = queries.parse_report_groups(group_by)
+    statement = queries.report_statement(
+        db.get_bind().dialect.name, current_user.id, groups,
+        type=type, category=category, start_date=start_date, end_date=end_date
+    )
+    return queries.report_result(db.execute(statement).all(), groups)
+
+# ✅ Exportar transações (CSV ou NDJSON) em streaming, lendo o banco em blocos
+@router.get("/export")
+def export_transactions(
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: str = None,
+    end_date: str = None,
+    type: str = None,
+    category: str = None
+):
+    conditions = queries.filter_conditions(
+        current_user.id, start_date=start_date, end_date=end_date, type=type, category=category
+    )
+    result = db.execute(export.export_statement(conditions))
+    media_type, extension = export.FORMATS[format]
+    return StreamingResponse(
+        export.stream(result, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transacoes.{extension}"'},
+    )
+
+# ✅ Importar extrato bancário (CSV ou OFX) lendo o arquivo aos poucos e inserindo em lotes
+@router.post("/import", response_model=schemas.TransactionImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    format: str = Query(None, pattern="^(csv|ofx)$"),
+    batch_size: int = Query(importer.BATCH_SIZE, ge=1, le=importer.MAX_BATCH_SIZE)
+):
+    format = format or importer.detect_format(file.filename)
+    encoding = importer.detect_encoding(file.file, format)
+    text_stream = io.TextIOWrapper(file.file, encoding=encoding, errors="replace", newline="")
+    try:
+        items = importer.iter_statement(text_stream, format)
+        return importer.import_statement(db, current_user.id, items, batch_size)
+    finally:
+        text_stream.detach()
+
+# ✅ Projeção de entradas, saídas e saldo para os próximos meses (NumPy, em cache pela versão dos dados)
+@router.get("/forecast", response_model=dict)
+def get_forecast(
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    months: int = Query(6, ge=1, le=forecast.MAX_MONTHS)
+):
+    version = db.scalar(queries.data_version_statement(current_user.id))
+    return forecast.cached_forecast(db, current_user.id, version, months)
+
+# ✅ Buscar transações por texto na descrição e na categoria (ordenadas por relevância)
+@router.get("/search", response_model=list[schemas.Transaction])
+def search_transactions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None
+):
+    offset = search.decode_cursor(cursor)
+    statement = search.search_statement(
+        db.get_bind().dialect.name, queries.LIST_COLUMNS, current_user.id, q, limit, offset
+    )
+    transactions = db.execute(statement).all() if statement is not None else []
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        response.headers["X-Next-Cursor"] = search.encode_cursor(offset + limit)
+
+    if settings.FAST_JSON:
+        return serializers.transactions_response(transactions, response)
+    return transactions
 
 # 🔹 Histórico detalhado das transações do usuário logado
 @router.get("/history", response_model=list[schemas.Transaction])
 def get_transaction_history(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+    all_: bool = Query(False, alias="all")
 ):
-    transactions = db.query(models.Transaction).filter(
-        models.Transaction.user_id == current_user.id
-    ).order_by(models.Transaction.date.desc()).all()
+    etag = queries.etag_for(request, current_user.id, db.scalar(queries.data_version_statement(current_user.id)))
+    if queries.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=queries.cache_headers(etag))
+    response.headers.update(queries.cache_headers(etag))
+
+    conditions = queries.filter_conditions(current_user.id)
+    transactions = db.execute(queries.page_statement(conditions, limit, cursor, all_)).all()
+    transactions, next_cursor = queries.split_page(transactions, limit, all_)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
-    if not transactions:
+    if not transactions and not cursor:
         raise HTTPException(status_code=404, detail="Nenhuma transação encontrada")
 
+    if settings.FAST_JSON:
+        return serializers.transactions_response(transactions, response)
     return transactions
 
 @router.get("/{transaction_id}", response_model=schemas.Transaction)
 def get_transaction(
     transaction_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
     transaction = db.query(models.Transaction).filter(
         models.Transaction.id == transaction_id,
@@ -121,22 +301,13 @@ def update_transaction(
     transaction_id: int,
     updated_data: schemas.TransactionUpdate,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
-    tr = (
-        db.query(models.Transaction)
-        .filter(
-            models.Transaction.id == transaction_id,
-            models.Transaction.user_id == current_user.id
-        )
-        .first()
+    changes = updated_data.model_dump(exclude_unset=True)
+    tr = _write_own_transaction(
+        db, transaction_id, current_user.id, lambda db, tr: rollups.update_transaction(db, tr, changes)
     )
-
-    if not tr:
-        raise HTTPException(status_code=404, detail="Transação não encontrada")
-
-    for attr, value in updated_data.model_dump(exclude_unset=True).items():
-        setattr(tr, attr, value)
+    db.execute(queries.bump_data_version_statement(current_user.id))
 
     db.commit()
     db.refresh(tr)
@@ -147,20 +318,9 @@ def update_transaction(
 def delete_transaction(
     transaction_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
-    tr_query = (
-        db.query(models.Transaction)
-        .filter(
-            models.Transaction.id == transaction_id,
-            models.Transaction.user_id == current_user.id
-        )
-    )
-    tr = tr_query.first()
-
-    if not tr:
-        raise HTTPException(status_code=404, detail="Transação não encontrada")
-
-    tr_query.delete(synchronize_session=False)
+    _write_own_transaction(db, transaction_id, current_user.id, rollups.delete_transaction)
+    db.execute(queries.bump_data_version_statement(current_user.id))
     db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,233 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, oauth2, queries, rollups, schemas, search, serializers, database
+from app.config import settings
+from app.queries import MAX_PAGE_SIZE, PAGE_SIZE
+
+# Versão assíncrona das rotas de transactions.py (modo ASYNC_DB). As consultas são as mesmas
+# de app/queries.py; a manutenção dos agregados roda via run_sync na mesma transação.
+router = APIRouter(prefix="/transactions", tags=["Transactions"])
+
+get_db = database.get_async_db
+get_current_user = oauth2.get_current_user_async
+
+
+async def _get_own_transaction(db: AsyncSession, transaction_id: int, user_id: int) -> models.Transaction:
+    transaction = await db.scalar(
+        select(models.Transaction).where(
+            models.Transaction.id == transaction_id,
+            models.Transaction.user_id == user_id
+        ).execution_options(populate_existing=True)
+    )
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transação não encontrada")
+    return transaction
+
+
+# Mesma releitura de transactions._write_own_transaction
+async def _write_own_transaction(db: AsyncSession, transaction_id: int, user_id: int, write) -> models.Transaction:
+    for _ in range(rollups.WRITE_RETRIES):
+        tr = await _get_own_transaction(db, transaction_id, user_id)
+        if await db.run_sync(write, tr):
+            return tr
+    raise HTTPException(status_code=409, detail="Transação alterada por outra requisição, tente novamente")
+
+
+@router.post("/", response_model=schemas.Transaction, status_code=status.HTTP_201_CREATED)
+async def create_transaction(
+    transaction: schemas.TransactionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    db_transaction = models.Transaction(**transaction.model_dump(), user_id=current_user.id)
+    db.add(db_transaction)
+    await db.flush()
+    await db.run_sync(rollups.apply_transactions, current_user.id, [db_transaction])
+    await db.run_sync(search.index_transactions, [db_transaction.id])
+    await db.execute(queries.bump_data_version_statement(current_user.id))
+    await db.commit()
+    await db.refresh(db_transaction)
+    return db_transaction
+
+
+@router.post("/bulk", response_model=schemas.TransactionBulkResult, status_code=status.HTTP_201_CREATED)
+async def create_transactions_bulk(
+    payload: schemas.TransactionBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    rows, positions, errors = queries.validate_bulk(payload, current_user.id)
+
+    new_ids = []
+    if rows:
+        result = await db.scalars(
+            insert(models.Transaction).returning(models.Transaction.id, sort_by_parameter_order=True),
+            rows,
+        )
+        new_ids = result.all()
+        await db.run_sync(rollups.apply_transactions, current_user.id, rows)
+        await db.run_sync(search.index_transactions, new_ids)
+        await db.execute(queries.bump_data_version_statement(current_user.id))
+        await db.commit()
+
+    return queries.bulk_result(payload, positions, new_ids, errors)
+
+
+@router.get("/", response_model=list[schemas.Transaction])
+async def get_transactions(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    start_date: str = None,
+    end_date: str = None,
+    type: str = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+    all_: bool = Query(False, alias="all")
+):
+    etag = queries.etag_for(request, current_user.id, await db.scalar(queries.data_version_statement(current_user.id)))
+    if queries.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=queries.cache_headers(etag))
+    response.headers.update(queries.cache_headers(etag))
+
+    conditions = queries.filter_conditions(current_user.id, start_date=start_date, end_date=end_date, type=type)
+    transactions = (await db.execute(queries.page_statement(conditions, limit, cursor, all_))).all()
+    transactions, next_cursor = queries.split_page(transactions, limit, all_)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if settings.FAST_JSON:
+        return serializers.transactions_response(transactions, response)
+    return transactions
+
+
+@router.delete("/", response_model=schemas.TransactionBulkDeleteResult)
+async def delete_transactions(
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    before: datetime = None,
+    type: str = None,
+    category: str = None,
+    dry_run: bool = False
+):
+    if before is None and type is None and category is None:
+        raise HTTPException(status_code=400, detail="Informe ao menos um filtro (before, type ou category)")
+
+    conditions = queries.filter_conditions(current_user.id, type=type, category=category, before=before)
+
+    if dry_run:
+        count = await db.scalar(select(func.count()).select_from(models.Transaction).where(*conditions))
+        return {"deleted": count, "dry_run": True}
+
+    deleted = await db.run_sync(rollups.delete_matching, current_user.id, conditions)
+    await db.execute(queries.bump_data_version_statement(current_user.id))
+    await db.commit()
+    return {"deleted": deleted}
+
+
+@router.get("/summary", response_model=dict)
+async def get_summary(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    start_date: str = None,
+    end_date: str = None,
+    category: str = None
+):
+    etag = queries.etag_for(request, current_user.id, await db.scalar(queries.data_version_statement(current_user.id)))
+    if queries.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=queries.cache_headers(etag))
+    response.headers.update(queries.cache_headers(etag))
+
+    statement = queries.summary_statement(current_user.id, start_date=start_date, end_date=end_date, category=category)
+    return queries.summary_result((await db.execute(statement)).all())
+
+
+@router.get("/report", response_model=dict)
+async def get_report(
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    group_by: str = "month",
+    type: str = None,
+    category: str = None,
+    start_date: str = None,
+    end_date: str = None
+):
+    groups = queries.parse_report_groups(group_by)
+    statement = queries.report_statement(
+        db.get_bind().dialect.name, current_user.id, groups,
+        type=type, category=category, start_date=start_date, end_date=end_date
+    )
+    return queries.report_result((await db.execute(statement)).all(), groups)
+
+
+@router.get("/history", response_model=list[schemas.Transaction])
+async def get_transaction_history(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+    all_: bool = Query(False, alias="all")
+):
+    etag = queries.etag_for(request, current_user.id, await db.scalar(queries.data_version_statement(current_user.id)))
+    if queries.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=queries.cache_headers(etag))
+    response.headers.update(queries.cache_headers(etag))
+
+    conditions = queries.filter_conditions(current_user.id)
+    transactions = (await db.execute(queries.page_statement(conditions, limit, cursor, all_))).all()
+    transactions, next_cursor = queries.split_page(transactions, limit, all_)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    if not transactions and not cursor:
+        raise HTTPException(status_code=404, detail="Nenhuma transação encontrada")
+
+    if settings.FAST_JSON:
+        return serializers.transactions_response(transactions, response)
+    return transactions
+
+
+# O conversor :int deixa caminhos como /transactions/export caírem nas rotas síncronas
+@router.get("/{transaction_id:int}", response_model=schemas.Transaction)
+async def get_transaction(
+    transaction_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    return await _get_own_transaction(db, transaction_id, current_user.id)
+
+
+@router.put("/{transaction_id:int}", response_model=schemas.Transaction, status_code=status.HTTP_200_OK)
+async def update_transaction(
+    transaction_id: int,
+    updated_data: schemas.TransactionUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    changes = updated_data.model_dump(exclude_unset=True)
+    tr = await _write_own_transaction(
+        db, transaction_id, current_user.id, lambda db, tr: rollups.update_transaction(db, tr, changes)
+    )
+    await db.execute(queries.bump_data_version_statement(current_user.id))
+
+    await db.commit()
+    await db.refresh(tr)
+    return tr
+
+
+@router.delete("/{transaction_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_transaction(
+    transaction_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    await _write_own_transaction(db, transaction_id, current_user.id, rollups.delete_transaction)
+    await db.execute(queries.bump_data_version_statement(current_user.id))
+    await db.commit()
+    return
@@ -1,28 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app import models, oauth2, schemas, database
+from app import hashing, jobs, models, oauth2, schemas, database
 from typing import List
 from app.database import get_db
+from app.routes.auth import user_by_email
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-# Criar um novo usuário
+def _save(db: Session, user: models.User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
+# Criar um novo usuário (async pelo bcrypt, como em auth.register_user)
 @router.post("/", response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+async def create_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
 
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = await run_in_threadpool(user_by_email, db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email já cadastrado!")
 
     new_user = models.User(
         name=user.name,
         email=user.email,
-        password=user.password,
+        password=await hashing.hasher.hash_async(user.password),
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_save, db, new_user)
     return new_user
 
 @router.get("/", response_model=list[schemas.UserResponse])
@@ -31,7 +37,7 @@ def get_users(db: Session = Depends(database.get_db)):
 
 # 🔹 Rota de perfil do usuário autenticado
 @router.get("/profile", response_model=schemas.UserResponse)
-def get_user_profile(current_user: models.User = Depends(oauth2.get_current_user)):
+def get_user_profile(current_user: schemas.CurrentUser = Depends(oauth2.get_current_user_record)):
     if not current_user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return current_user
@@ -53,6 +59,7 @@ def update_user(
 
     db.commit()
     db.refresh(user)
+    oauth2.user_cache.invalidate(user_id)
     return user
 
 @router.delete("/{user_id}")
@@ -61,6 +68,11 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    db.query(models.MonthlyRollup).filter(models.MonthlyRollup.user_id == user_id).delete()
+    results = db.scalars(jobs.user_results_statement(user_id)).all()
+    db.execute(jobs.delete_user_jobs_statement(user_id))
     db.delete(db_user)
     db.commit()
+    jobs.runner.remove_results(results)
+    oauth2.user_cache.invalidate(user_id)
     return {"message": "User deleted successfully"}
\ No newline at end of file
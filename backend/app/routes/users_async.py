@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import jobs, models, oauth2, schemas, database
+from app.hashing import hasher
+
+# Versão assíncrona das rotas de users.py (modo ASYNC_DB)
+router = APIRouter(prefix="/users", tags=["Users"])
+
+get_db = database.get_async_db
+
+
+@router.post("/", response_model=schemas.UserResponse)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(models.User).where(models.User.email == user.email))
+    if existing_user:
+        raise HTTPException(status_code=400, detail="Email já cadastrado!")
+
+    new_user = models.User(
+        name=user.name,
+        email=user.email,
+        password=await hasher.hash_async(user.password),
+    )
+
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    return new_user
+
+
+@router.get("/", response_model=list[schemas.UserResponse])
+async def get_users(db: AsyncSession = Depends(get_db)):
+    return (await db.scalars(select(models.User))).all()
+
+
+@router.get("/profile", response_model=schemas.UserResponse)
+async def get_user_profile(current_user: schemas.CurrentUser = Depends(oauth2.get_current_user_record_async)):
+    return current_user
+
+
+@router.put("/{user_id:int}", response_model=schemas.UserResponse)
+async def update_user(
+    user_id: int,
+    updated_data: schemas.UserUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    for attr, value in updated_data.model_dump(exclude_unset=True).items():
+        setattr(user, attr, value)
+
+    await db.commit()
+    await db.refresh(user)
+    oauth2.user_cache.invalidate(user_id)
+    return user
+
+
+@router.delete("/{user_id:int}")
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    db_user = await db.get(models.User, user_id)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    await db.execute(delete(models.MonthlyRollup).where(models.MonthlyRollup.user_id == user_id))
+    results = (await db.scalars(jobs.user_results_statement(user_id))).all()
+    await db.execute(jobs.delete_user_jobs_statement(user_id))
+    await db.delete(db_user)
+    await db.commit()
+    jobs.runner.remove_results(results)
+    oauth2.user_cache.invalidate(user_id)
+    return {"message": "User deleted successfully"}
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import Any, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
@@ -30,10 +30,22 @@ class UserResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
     
+class CurrentUser(BaseModel):
+    """Identidade do usuário autenticado (guardada no cache de autenticação)."""
+    id: int
+    name: str
+    email: str
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
 class UserLogin(BaseModel):
     email: str
     password: str
     
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 class UserUpdate(BaseModel):
     name: str | None = None
     email: str | None = None
@@ -51,6 +63,29 @@ class TransactionBase(BaseModel):
 class TransactionCreate(TransactionBase):
     pass
 
+class TransactionBulkCreate(BaseModel):
+    # Os itens são validados um a um na rota, para permitir o relatório de erros por item
+    transactions: list[dict[str, Any]] = Field(..., max_length=10_000)
+    atomic: bool = True  # True: tudo ou nada | False: insere os válidos e reporta os inválidos
+
+class TransactionBulkError(BaseModel):
+    index: int
+    detail: Any
+
+class TransactionBulkResult(BaseModel):
+    ids: list[int | None]  # na mesma ordem da entrada (None para itens rejeitados)
+    created: int
+    errors: list[TransactionBulkError] = []
+
+class TransactionImportError(BaseModel):
+    line: int  # linha do CSV (ou número da transação, no OFX)
+    detail: Any
+
+class TransactionImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TransactionImportError] = []  # limitado às primeiras 1000 falhas
+
 class Transaction(TransactionBase):
     id: int
     user_id: int
@@ -64,6 +99,10 @@ class TransactionResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class TransactionBulkDeleteResult(BaseModel):
+    deleted: int  # no modo dry_run, quantas transações seriam apagadas
+    dry_run: bool = False
+
 class TransactionSummary(BaseModel):
     user_id: int
     total_income: float
@@ -75,4 +114,33 @@ class TransactionUpdate(BaseModel):
     amount: float | None = None
     category: str | None = None
     type: str | None = None
-    date: datetime | None = None
\ No newline at end of file
+    date: datetime | None = None
+
+    # Omitir um campo mantém o valor atual; null só vale para category (date nula quebraria
+    # a ordenação e o cursor da listagem, e as demais colunas são NOT NULL)
+    @field_validator("description", "amount", "type", "date", mode="before")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("não pode ser nulo")
+        return value
+
+# =====================
+# JOBS
+# =====================
+class JobCreate(BaseModel):
+    kind: str  # "export", "report" ou "rollups"
+    params: dict[str, Any] = {}
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    params: dict[str, Any]
+    status: str  # queued, running, done, failed, cancelled
+    progress: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
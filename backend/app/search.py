@@ -0,0 +1,161 @@
+"""Busca textual nas descrições e categorias das transações.
+
+SQLite: tabela virtual FTS5 `transactions_fts` com conteúdo externo (o texto fica só em
+transactions), ordenada por bm25. O user_id também é uma coluna do índice e entra no
+próprio MATCH: o FTS5 só percorre e ranqueia as linhas do usuário, então a busca custa o
+tamanho da conta, não o do banco inteiro. Edições e exclusões são refletidas por triggers; as
+inserções são indexadas pelas rotas com index_transactions, um INSERT ... SELECT por lote,
+como os agregados de app.rollups (o FTS5 grava um segmento a cada statement disparado por
+trigger, o que deixaria a criação em lote e a importação ~20x mais lentas). PostgreSQL: coluna
+gerada `search_vector` (tsvector) com índice GIN e ordenação por ts_rank. Nos demais
+bancos a busca cai num LIKE simples, sem índice.
+
+A criação acompanha a tabela transactions (eventos after_create/before_drop, usados pelo
+create_all); bancos existentes recebem o índice pela migração 5 (e o refazem com user_id na 8).
+"""
+import base64
+import re
+from fastapi import HTTPException
+from sqlalchemy import DDL, Column, Integer, MetaData, Table, Text, event, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+from app import models
+
+FTS_TABLE = "transactions_fts"
+
+fts = Table(
+    FTS_TABLE,
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("description", Text),
+    Column("category", Text),
+    Column("user_id", Integer),
+)
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "description, category, user_id, content='transactions', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, category, user_id) "
+    "VALUES ('delete', old.id, old.description, old.category, old.user_id); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description, category, user_id ON transactions BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, category, user_id) "
+    "VALUES ('delete', old.id, old.description, old.category, old.user_id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, description, category, user_id) "
+    "VALUES (new.id, new.description, new.category, new.user_id); "
+    "END",
+)
+SQLITE_DROP = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+POSTGRES_DDL = (
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('portuguese', coalesce(description, '') || ' ' || coalesce(category, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_search_vector ON transactions USING GIN (search_vector)",
+)
+
+for statement in SQLITE_DDL:
+    event.listen(models.Transaction.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_DDL:
+    event.listen(models.Transaction.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    models.Transaction.__table__, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def install(conn):
+    """Cria (ou refaz, se já existir) o índice num banco existente e o popula com as transações atuais."""
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_DROP + SQLITE_DDL:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif conn.dialect.name == "postgresql":
+        for statement in POSTGRES_DDL:
+            conn.exec_driver_sql(statement)
+
+
+def index_transactions(db: Session, ids):
+    """Inclui no índice as transações recém-inseridas (no PostgreSQL a coluna gerada já basta)."""
+    if not ids or db.get_bind().dialect.name != "sqlite":
+        return
+    transaction = models.Transaction
+    db.execute(
+        fts.insert().from_select(
+            ["rowid", "description", "category", "user_id"],
+            select(transaction.id, transaction.description, transaction.category, transaction.user_id)
+            .where(transaction.id.in_(ids)),
+        )
+    )
+
+
+def fts_query(user_id: int, q: str) -> str | None:
+    """Converte o texto digitado numa consulta FTS5 segura, restrita às linhas do usuário.
+
+    "merc pão" -> user_id : "7" AND {description category} : ("merc"* "pão"*): todos os
+    termos, com prefixo, só no texto. Aspas e operadores do usuário nunca chegam ao MATCH.
+    """
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    text = " ".join(f'"{term}"*' for term in terms)
+    return f'user_id : "{int(user_id)}" AND {{description category}} : ({text})'
+
+
+def search_statement(dialect_name: str, columns, user_id: int, q: str, limit: int, offset: int):
+    """Transações do usuário que casam com `q`, das mais relevantes para as menos.
+
+    Busca limit + 1 linhas para saber se existe próxima página (como queries.page_statement).
+    """
+    transaction = models.Transaction
+    if dialect_name == "sqlite":
+        match = fts_query(user_id, q)
+        if match is None:
+            return None
+        stmt = (
+            select(*columns)
+            .select_from(fts.join(transaction, transaction.id == fts.c.rowid))
+            .where(literal_column(FTS_TABLE).op("MATCH")(match), transaction.user_id == user_id)
+            # Peso 0 para a coluna user_id: todas as linhas do usuário casam com ela igualmente
+            .order_by(func.bm25(literal_column(FTS_TABLE), 1.0, 1.0, 0.0), transaction.id.desc())
+        )
+    elif dialect_name == "postgresql":
+        vector = literal_column("transactions.search_vector")
+        query = func.websearch_to_tsquery("portuguese", q)
+        stmt = (
+            select(*columns)
+            .where(vector.op("@@")(query), transaction.user_id == user_id)
+            .order_by(func.ts_rank(vector, query).desc(), transaction.id.desc())
+        )
+    else:
+        pattern = f"%{q}%"
+        stmt = (
+            select(*columns)
+            .where(
+                or_(transaction.description.ilike(pattern), transaction.category.ilike(pattern)),
+                transaction.user_id == user_id,
+            )
+            .order_by(transaction.date.desc(), transaction.id.desc())
+        )
+    return stmt.limit(limit + 1).offset(offset)
+
+
+def encode_cursor(offset: int) -> str:
+    # Em resultados ordenados por relevância o cursor é a posição da próxima página
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if prefix != "offset" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
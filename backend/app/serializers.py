@@ -0,0 +1,26 @@
+"""Serialização rápida das listas de transações.
+
+Com `response_model=list[schemas.Transaction]` o FastAPI valida cada linha com o Pydantic e
+depois a serializa de novo; em históricos grandes isso domina o tempo de CPU. Aqui as
+linhas já chegam como tuplas das colunas selecionadas (sem objetos ORM) e viram JSON
+direto com o orjson, no mesmo formato do schema.
+"""
+import orjson
+from fastapi import Response
+
+
+def transaction_dict(row) -> dict:
+    # As colunas de queries.LIST_COLUMNS já seguem a ordem dos campos de schemas.Transaction
+    values = row._asdict()
+    values["amount"] = float(values["amount"])
+    return values
+
+
+def dumps_transactions(rows) -> bytes:
+    return orjson.dumps([transaction_dict(row) for row in rows])
+
+
+def transactions_response(rows, response: Response) -> Response:
+    """Resposta JSON pronta, levando os cabeçalhos já definidos na rota (cursor, ETag)."""
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(dumps_transactions(rows), media_type="application/json", headers=headers)
@@ -0,0 +1,53 @@
+"""Ponto de entrada do servidor: prepara o banco uma vez e sobe o uvicorn com N processos.
+
+As migrações rodam aqui, no processo principal, antes de abrir os workers; os workers
+(prefork, um por núcleo) só importam o app, sem checagens de DDL na subida. Cada worker
+tem seu pool de conexões e seus workers de tarefas (app.jobs), que dividem a fila pelo banco.
+
+O resto do estado em memória é de cada processo:
+- cache de usuário (app.oauth2.user_cache): PUT/DELETE /users/{id} invalida só o do worker
+  que atendeu; nos outros o cadastro antigo vale por até USER_CACHE_TTL_SECONDS;
+- caches de gráficos e previsões (app.charts, app.forecast): a chave leva users.data_version,
+  lida do banco a cada requisição, então nunca servem dado velho; só se repetem por worker,
+  assim como os ETags, que também vêm do banco;
+- GET /metrics: cada worker responde com os próprios contadores, com o rótulo `pid`.
+
+Uso (a partir de backend/):
+    python -m app.serve                        # HOST, PORT e WEB_CONCURRENCY das configurações
+    python -m app.serve --workers 4 --port 8000
+    python -m app.serve --skip-migrations      # banco já migrado em outro passo do deploy
+"""
+import argparse
+import os
+import uvicorn
+from app import database, migrations
+from app.config import settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY, help="processos (prefork)")
+    parser.add_argument("--skip-migrations", action="store_true", help="não cria tabelas nem aplica migrações")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.skip_migrations:
+        versions = migrations.init_db(database.engine)
+        if versions:
+            print(f"Migrações aplicadas: {versions}")
+        # Os workers abrem as próprias conexões
+        database.engine.dispose()
+
+    # O banco já está pronto: nem este processo nem os workers (que herdam o ambiente) refazem
+    os.environ["DB_AUTO_MIGRATE"] = "false"
+    settings.DB_AUTO_MIGRATE = False
+
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,99 @@
-from jose import JWTError, jwt
+"""Emissão e verificação dos tokens JWT (acesso e refresh).
+
+O token de acesso é curto (ACCESS_TOKEN_EXPIRE_MINUTES) e já traz o que as rotas precisam
+do usuário (id, nome e e-mail): autenticar uma requisição é verificar a assinatura, sem ir
+ao banco. O mesmo token repetido nem isso: a verificação fica em cache até o exp.
+
+O refresh token é longo e só vale em POST /auth/refresh, que confere o usuário no banco
+(conta apagada não renova) e devolve um par novo, com nome e e-mail atualizados. Cada
+refresh token vale uma vez: o `jti` dele é registrado na troca (app.oauth2).
+
+Cada token leva no cabeçalho o `kid` da chave que o assinou, então a chave pode ser trocada
+sem derrubar as sessões abertas (ver JWT_PREVIOUS_KEYS em app.config).
+"""
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
+from jose import JWTError, jwt
+from app import schemas
+from app.cache import TTLCache
+from app.config import settings
+
+
+class InvalidToken(Exception):
+    """Token malformado, expirado, de outro tipo ou assinado por chave desconhecida."""
+
+
+class TokenService:
+    def __init__(self, keys: dict[str, str], current_kid: str, algorithm: str,
+                 access_ttl: timedelta, refresh_ttl: timedelta, cache: TTLCache):
+        if current_kid not in keys:
+            raise ValueError(f"Chave de assinatura {current_kid!r} não está no registro")
+        self.keys = keys
+        self.current_kid = current_kid
+        self.algorithm = algorithm
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.cache = cache
+
+    def _encode(self, claims: dict, ttl: timedelta) -> str:
+        now = datetime.now(timezone.utc)
+        return jwt.encode(
+            {**claims, "iat": now, "exp": now + ttl},
+            self.keys[self.current_kid],
+            algorithm=self.algorithm,
+            headers={"kid": self.current_kid},
+        )
+
+    def issue(self, user) -> dict:
+        """Par de tokens (acesso + refresh) para o usuário."""
+        subject = str(user.id)
+        return {
+            "access_token": self._encode(
+                {"sub": subject, "type": "access", "name": user.name, "email": user.email}, self.access_ttl
+            ),
+            "refresh_token": self._encode({"sub": subject, "type": "refresh", "jti": uuid.uuid4().hex}, self.refresh_ttl),
+            "token_type": "bearer",
+            "expires_in": int(self.access_ttl.total_seconds()),
+        }
+
+    def decode(self, token: str, expected_type: str) -> dict:
+        try:
+            key = self.keys.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise InvalidToken("Chave desconhecida")
+            claims = jwt.decode(token, key, algorithms=[self.algorithm])
+        except JWTError as exc:
+            raise InvalidToken(str(exc)) from exc
+        if claims.get("type") != expected_type or "sub" not in claims:
+            raise InvalidToken("Tipo de token inválido")
+        return claims
+
+    def authenticate(self, token: str) -> schemas.CurrentUser:
+        """Identidade do token de acesso, direto das claims (sem consulta ao banco)."""
+        cached = self.cache.get(token)
+        if cached is not None:
+            user, expires_at, kid = cached
+            # Chave retirada do registro derruba na hora até os tokens já verificados
+            if expires_at > time.time() and kid in self.keys:
+                return user
+            self.cache.invalidate(token)
+            raise InvalidToken("Token expirado ou chave retirada")
+
+        claims = self.decode(token, "access")
+        try:
+            user = schemas.CurrentUser(id=int(claims["sub"]), name=claims["name"], email=claims["email"])
+        except (KeyError, ValueError) as exc:
+            raise InvalidToken("Claims incompletas") from exc
+        self.cache.set(token, (user, claims["exp"], jwt.get_unverified_header(token)["kid"]))
+        return user
 
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+tokens = TokenService(
+    keys={**settings.JWT_PREVIOUS_KEYS, settings.JWT_KEY_ID: settings.SECRET_KEY},
+    current_kid=settings.JWT_KEY_ID,
+    algorithm=settings.ALGORITHM,
+    access_ttl=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    refresh_ttl=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    cache=TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS),
+)
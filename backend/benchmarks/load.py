@@ -0,0 +1,262 @@
+"""Benchmark de carga e latência das rotas reais da API.
+
+Semeia usuários e transações sintéticos (via /auth/register e /transactions/bulk) e dispara
+cada rota com níveis fixos de concorrência, medindo vazão e latência p50/p95/p99. O
+resultado sai em JSON para comparar entre commits.
+
+Sem --base-url a API roda no próprio processo (ASGI, banco SQLite temporário); com
+--base-url as requisições vão para um servidor já no ar (ex.: uvicorn com o banco de produção).
+
+Uso (a partir de backend/):
+    python -m benchmarks.load --rows 10000 --concurrency 1 8 32 --output bench.json
+    python -m benchmarks.load --rows 1000000 --base-url http://localhost:8000
+    python -m benchmarks.load --compare bench-main.json --output bench.json   # falha se piorar
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+import httpx
+
+ENDPOINTS = ("login", "create", "list", "summary", "history", "update", "delete")
+BULK_CHUNK = 10_000
+PASSWORD = "benchmark-123"
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(p / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    samples = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(samples) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(statistics.fmean(samples)) if samples else 0.0,
+        "p50_ms": ms(percentile(samples, 50)),
+        "p95_ms": ms(percentile(samples, 95)),
+        "p99_ms": ms(percentile(samples, 99)),
+    }
+
+
+# =====================
+# DADOS SINTÉTICOS
+# =====================
+
+def synthetic_transactions(start: int, count: int) -> list[dict]:
+    base = datetime(2023, 1, 1)
+    return [
+        {
+            "description": f"transação {i}",
+            "amount": round((i * 37 % 500_00) / 100 + 1, 2),
+            "type": "expense" if i % 4 else "income",
+            "category": ("Mercado", "Transporte", "Lazer", "Casa", "Salário")[i % 5],
+            "date": (base + timedelta(minutes=17 * i)).isoformat(),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+async def seed(client: httpx.AsyncClient, users: int, rows: int) -> list[dict]:
+    """Cadastra `users` usuários e distribui `rows` transações entre eles."""
+    run_id = int(time.time())
+    accounts = []
+    for u in range(users):
+        email = f"bench-{run_id}-{u}@example.com"
+        await client.post("/auth/register", json={"name": f"Bench {u}", "email": email, "password": PASSWORD})
+        response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        accounts.append({"email": email, "headers": headers, "created": []})
+
+    per_user = rows // users
+    for u, account in enumerate(accounts):
+        total = per_user + (rows % users if u == 0 else 0)
+        for start in range(0, total, BULK_CHUNK):
+            payload = {"transactions": synthetic_transactions(start, min(BULK_CHUNK, total - start))}
+            response = await client.post("/transactions/bulk", json=payload, headers=account["headers"])
+            response.raise_for_status()
+    return accounts
+
+
+# =====================
+# CARGA
+# =====================
+
+def request_factory(endpoint: str, accounts: list[dict]):
+    """Devolve uma corrotina (client, n) -> Response para a rota pedida."""
+    def account(n):
+        return accounts[n % len(accounts)]
+
+    async def login(client, n):
+        return await client.post("/auth/login", json={"email": account(n)["email"], "password": PASSWORD})
+
+    async def create(client, n):
+        item = synthetic_transactions(n, 1)[0]
+        response = await client.post("/transactions/", json=item, headers=account(n)["headers"])
+        if response.status_code == 201:
+            account(n)["created"].append(response.json()["id"])
+        return response
+
+    async def list_(client, n):
+        return await client.get("/transactions/", headers=account(n)["headers"])
+
+    async def summary(client, n):
+        return await client.get("/transactions/summary", headers=account(n)["headers"])
+
+    async def history(client, n):
+        return await client.get("/transactions/history", headers=account(n)["headers"])
+
+    async def update(client, n):
+        created = account(n)["created"]
+        transaction_id = created[n // len(accounts) % len(created)]
+        return await client.put(f"/transactions/{transaction_id}", json={"description": f"editada {n}"},
+                                headers=account(n)["headers"])
+
+    async def delete(client, n):
+        created = account(n)["created"]
+        return await client.delete(f"/transactions/{created.pop()}", headers=account(n)["headers"])
+
+    return {"login": login, "create": create, "list": list_, "summary": summary,
+            "history": history, "update": update, "delete": delete}[endpoint]
+
+
+async def drive(client: httpx.AsyncClient, send, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            start = time.perf_counter()
+            try:
+                response = await send(client, n)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run(args, transport=None) -> dict:
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=args.base_url or "http://bench", transport=transport,
+                                 timeout=args.timeout, limits=limits) as client:
+        seed_start = time.perf_counter()
+        accounts = await seed(client, args.users, args.rows)
+        seed_seconds = time.perf_counter() - seed_start
+
+        results = {}
+        for concurrency in args.concurrency:
+            level = results[str(concurrency)] = {}
+            # create vem antes de update/delete, que usam as transações criadas por ela
+            for endpoint in args.endpoints:
+                level[endpoint] = await drive(client, request_factory(endpoint, accounts), args.requests, concurrency)
+                print(f"c={concurrency:<4} {endpoint:<8} " + "  ".join(
+                    f"{k}={v}" for k, v in level[endpoint].items()), file=sys.stderr)
+    return {"seed_seconds": round(seed_seconds, 2), "results": results}
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "target": args.base_url or "in-process",
+        "rows": args.rows,
+        "users": args.users,
+        "requests_per_endpoint": args.requests,
+        "concurrency": args.concurrency,
+    }
+
+
+def compare(baseline: dict, current: dict, max_regression: float) -> list[str]:
+    """Lista as rotas cujo p95 piorou mais que `max_regression` (fração) em relação à base."""
+    regressions = []
+    for level, endpoints in current["results"].items():
+        for endpoint, stats in endpoints.items():
+            before = baseline.get("results", {}).get(level, {}).get(endpoint)
+            if not before or not before["p95_ms"]:
+                continue
+            change = stats["p95_ms"] / before["p95_ms"] - 1
+            if change > max_regression:
+                regressions.append(
+                    f"c={level} {endpoint}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="transações semeadas (1k a 1M)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requisições por rota e nível")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--base-url", help="servidor já no ar; sem ele a API roda no próprio processo")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="piora tolerada no p95 (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    if "update" in args.endpoints or "delete" in args.endpoints:
+        # update e delete precisam das transações criadas pela etapa create
+        args.endpoints = [e for e in ENDPOINTS if e in args.endpoints or e == "create"]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    transport = None
+    if not args.base_url:
+        if "app.main" not in sys.modules:
+            # Banco descartável, definido antes de a aplicação ler as configurações
+            os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='moneytrack-load-')}/bench.db")
+            from app import database, migrations
+            # O ASGITransport não dispara o lifespan: o banco é preparado aqui, como faz o app.serve.
+            # Com o app já importado (testes) o banco é o de quem importou, e não é tocado.
+            migrations.init_db(database.engine)
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+
+    report = {"meta": metadata(args), **asyncio.run(run(args, transport))}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSÃO {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compara a serialização das listagens: caminho antigo (ORM + Pydantic) x rápido (colunas + orjson).
+
+Mede a serialização isolada e a rota GET /transactions/?all=true de ponta a ponta, com
+FAST_JSON desligado e ligado, num banco SQLite temporário.
+
+Uso (a partir de backend/):
+    python -m benchmarks.serialization                   # 10k e 100k linhas
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+_tmpdir = tempfile.mkdtemp(prefix="moneytrack-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+from app import database, migrations, models, queries, rollups, schemas, serializers  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.token import tokens  # noqa: E402
+
+transactions_adapter = TypeAdapter(list[schemas.Transaction])
+
+
+def seed(db, rows: int) -> int:
+    db.execute(delete(models.Transaction))
+    db.execute(delete(models.MonthlyRollup))
+    db.execute(delete(models.User))
+    user = models.User(name="Benchmark", email="bench@example.com", password="x")
+    db.add(user)
+    db.flush()
+    values = [
+        {
+            "description": f"transação {i}", "amount": (i % 5000) / 100 + 1,
+            "type": "expense" if i % 3 else "income", "category": f"Categoria {i % 12}",
+            "date": datetime(2024, 1 + i % 12, 1 + i % 28, 12), "user_id": user.id,
+        }
+        for i in range(rows)
+    ]
+    for start in range(0, rows, 10_000):
+        db.execute(insert(models.Transaction), values[start:start + 10_000])
+    rollups.rebuild(db, user.id)
+    db.commit()
+    return user.id
+
+
+def timed(func, repeat: int) -> dict:
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(func())
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1), "bytes": size}
+
+
+def run(rows: int, repeat: int) -> dict:
+    migrations.init_db(database.engine)
+    db = database.SessionLocal()
+    try:
+        user_id = seed(db, rows)
+        conditions = queries.filter_conditions(user_id)
+
+        def orm_pydantic():
+            # Caminho antigo: objetos ORM completos validados e serializados pelo Pydantic
+            stmt = select(models.Transaction).where(*conditions).order_by(
+                models.Transaction.date.desc(), models.Transaction.id.desc())
+            db.expire_all()
+            return transactions_adapter.dump_json(
+                transactions_adapter.validate_python(db.scalars(stmt).all(), from_attributes=True))
+
+        def columns_orjson():
+            return serializers.dumps_transactions(
+                db.execute(queries.page_statement(conditions, 0, None, True)).all())
+
+        results = {
+            "serialization": {
+                "orm_pydantic": timed(orm_pydantic, repeat),
+                "columns_orjson": timed(columns_orjson, repeat),
+            },
+            "route": {},
+        }
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    user = schemas.CurrentUser(id=user_id, name="Benchmark", email="bench@example.com")
+    headers = {"Authorization": f"Bearer {tokens.issue(user)['access_token']}"}
+    for name, fast in (("response_model", False), ("fast_json", True)):
+        settings.FAST_JSON = fast
+        results["route"][name] = timed(
+            lambda: client.get("/transactions/", params={"all": "true"}, headers=headers).content, repeat)
+    settings.FAST_JSON = True
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report = {str(rows): run(rows, args.repeat) for rows in args.rows}
+    for rows, result in report.items():
+        for section, variants in result.items():
+            old, new = variants.values()
+            print(f"{rows:>7} linhas | {section:<13} | " + " | ".join(
+                f"{name}: {v['median_ms']} ms" for name, v in variants.items()
+            ) + f" | {old['median_ms'] / new['median_ms']:.1f}x")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
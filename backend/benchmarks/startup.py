@@ -0,0 +1,130 @@
+"""Benchmark de subida: quanto custa um processo novo até responder a primeira requisição.
+
+Cada rodada é um interpretador novo (como um worker recém-criado pelo app.serve) que mede:
+import do app.main, subida (lifespan: migrações se DB_AUTO_MIGRATE e workers de tarefas),
+primeira e segunda requisição (GET /health/ready). O banco é preparado antes com
+`python -m app.migrations`, como no deploy. O resultado sai em JSON para comparar entre commits.
+
+Uso (a partir de backend/):
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --auto-migrate      # subida com checagem de migrações no processo
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "second_request_ms", "total_ms")
+
+
+def probe():
+    """Roda dentro do processo medido e imprime as fases em JSON."""
+    ms = lambda seconds: round(seconds * 1000, 2)  # noqa: E731
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        client.get("/health/ready").raise_for_status()
+        first = time.perf_counter()
+        client.get("/health/ready").raise_for_status()
+        second = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": ms(imported - start),
+        "startup_ms": ms(started - imported),
+        "first_request_ms": ms(first - started),
+        "second_request_ms": ms(second - first),
+    }))
+
+
+def measure(env: dict) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--probe"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    # total: do fork do interpretador até a segunda resposta (inclui o próprio Python subir)
+    return {**json.loads(output.strip().splitlines()[-1]), "total_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def summarize(samples: list[dict]) -> dict:
+    return {
+        phase: {
+            "median": round(statistics.median(s[phase] for s in samples), 2),
+            "min": min(s[phase] for s in samples),
+            "max": max(s[phase] for s in samples),
+        }
+        for phase in PHASES
+    }
+
+
+def run(args) -> dict:
+    directory = tempfile.mkdtemp(prefix="moneytrack-startup-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{directory}/startup.db",
+        "JOB_RESULTS_DIR": os.path.join(directory, "jobs"),
+        "DB_AUTO_MIGRATE": "true" if args.auto_migrate else "false",
+    }
+    subprocess.run([sys.executable, "-m", "app.migrations"], cwd=BACKEND_DIR, env=env,
+                   capture_output=True, check=True)
+
+    samples = []
+    for n in range(args.runs):
+        samples.append(measure(env))
+        print(f"rodada {n + 1}: " + "  ".join(f"{k}={v}" for k, v in samples[-1].items()), file=sys.stderr)
+    return {"results": summarize(samples), "runs": samples}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="processos medidos")
+    parser.add_argument("--auto-migrate", action="store_true",
+                        help="subida como no uvicorn direto (DB_AUTO_MIGRATE=true), em vez de como no app.serve")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.probe:
+        probe()
+        return
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "runs": args.runs,
+            "auto_migrate": args.auto_migrate,
+        },
+        **run(args),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
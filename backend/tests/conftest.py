@@ -1,21 +1,32 @@
+import os
+import tempfile
+
+# Hash barato nos testes (a política de produção é configurada por BCRYPT_ROUNDS)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Resultados das tarefas em segundo plano fora da árvore do projeto
+os.environ.setdefault("JOB_RESULTS_DIR", tempfile.mkdtemp(prefix="moneytrack-jobs-"))
+
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, make_engine
+from app import jobs, migrations
 
 # Banco de testes
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Cria o DB limpo
+# Cria o DB limpo (e refaz todas as migrações a partir do zero)
 Base.metadata.drop_all(bind=engine)
+migrations.schema_version.drop(engine, checkfirst=True)
 Base.metadata.create_all(bind=engine)
+migrations.upgrade(engine)
 
 
 # Override do get_db
@@ -28,9 +39,38 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+# Os workers das tarefas abrem as próprias sessões: também no banco de testes
+jobs.runner.session_factory = TestingSessionLocal
 
 
 # Cliente de teste
 @pytest.fixture
 def client():
     return TestClient(app)
+
+
+# Registra os comandos SQL executados no banco de testes (para testes de contagem de queries)
+@pytest.fixture
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+# Orçamento de queries: `with max_queries(2): client.get(...)` falha se o bloco passar do limite
+@pytest.fixture
+def max_queries(count_queries):
+    @contextmanager
+    def check(limit: int, label: str = "Bloco"):
+        start = len(count_queries)
+        yield
+        executed = count_queries[start:]
+        assert len(executed) <= limit, (
+            f"{label} executou {len(executed)} queries (máximo {limit}):\n" + "\n".join(executed)
+        )
+    return check
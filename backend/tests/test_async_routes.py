@@ -0,0 +1,113 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.pool import NullPool
+from app import database, rollups
+from app.routes import auth, auth_async, transactions, transactions_async, users, users_async
+from tests.conftest import SQLALCHEMY_DATABASE_URL, TestingSessionLocal, override_get_db
+
+# Mesmo arranjo do main.py com ASYNC_DB: rotas async primeiro, síncronas como fallback
+async_app = FastAPI()
+for module in (transactions_async, users_async, auth_async, transactions, users, auth):
+    async_app.include_router(module.router)
+
+# NullPool: o TestClient pode usar um event loop diferente a cada requisição
+async_engine = database.make_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+async_app.dependency_overrides[database.get_async_db] = override_get_async_db
+async_app.dependency_overrides[database.get_db] = override_get_db
+
+client = TestClient(async_app)
+
+
+def _headers():
+    client.post("/auth/register", json={"name": "Async", "email": "async@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "async@example.com", "password": "123456"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_async_routes_take_precedence():
+    """Com a sessão síncrona indisponível, as rotas com versão async continuam funcionando"""
+    headers = _headers()
+
+    def broken_get_db():
+        raise RuntimeError("a rota síncrona não deveria ser usada")
+        yield
+
+    async_app.dependency_overrides[database.get_db] = broken_get_db
+    try:
+        assert client.get("/transactions/summary", headers=headers).status_code == 200
+        assert client.get("/transactions/", headers=headers).status_code == 200
+        assert client.get("/users/profile", headers=headers).status_code == 200
+
+        refresh = {"refresh_token": client.post(
+            "/auth/login", json={"email": "async@example.com", "password": "123456"}
+        ).json()["refresh_token"]}
+        assert client.post("/auth/refresh", json=refresh).status_code == 200
+        assert client.post("/auth/refresh", json=refresh).status_code == 401
+    finally:
+        async_app.dependency_overrides[database.get_db] = override_get_db
+
+
+def test_async_transaction_crud():
+    headers = _headers()
+
+    response = client.post("/transactions/", json={
+        "description": "async", "amount": 42.5, "type": "income", "category": "Teste",
+        "date": "2024-07-01T00:00:00"
+    }, headers=headers)
+    assert response.status_code == 201
+    transaction_id = response.json()["id"]
+
+    items = [{"description": f"lote async {i}", "amount": 1.25, "type": "expense",
+              "date": "2024-07-02T00:00:00"} for i in range(4)]
+    response = client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+    assert response.json()["created"] == 4
+
+    response = client.get("/transactions/", params={"limit": 3}, headers=headers)
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" in response.headers
+
+    response = client.put(f"/transactions/{transaction_id}", json={"amount": 50}, headers=headers)
+    assert response.json()["amount"] == 50
+
+    assert client.get("/transactions/summary", headers=headers).json() == {
+        "total_income": 50.0, "total_expense": 5.0, "balance": 45.0
+    }
+    report = client.get("/transactions/report", params={"group_by": "type"}, headers=headers).json()
+    assert [b["type"] for b in report["buckets"]] == ["expense", "income"]
+
+    assert client.delete(f"/transactions/{transaction_id}", headers=headers).status_code == 204
+    assert client.get(f"/transactions/{transaction_id}", headers=headers).status_code == 404
+    assert client.delete("/transactions/", params={"type": "expense"}, headers=headers).json()["deleted"] == 4
+
+    db = TestingSessionLocal()
+    try:
+        assert rollups.check(db) == []
+    finally:
+        db.close()
+
+    # Rota sem versão assíncrona continua atendida pela síncrona
+    profile = client.get("/users/profile", headers=headers).json()
+    assert client.get(f"/transactions/user/{profile['id']}").status_code == 200
+
+
+def test_async_user_routes():
+    create = client.post("/users/", json={"name": "Async User", "email": "async_user@example.com", "password": "123456"})
+    assert create.status_code == 200
+    user_id = create.json()["id"]
+
+    response = client.put(f"/users/{user_id}", json={"name": "Async Renomeado"})
+    assert response.json()["name"] == "Async Renomeado"
+
+    assert client.delete(f"/users/{user_id}").json()["message"] == "User deleted successfully"
+    response = client.post("/auth/login", json={"email": "async_user@example.com", "password": "123456"})
+    assert response.status_code == 404
@@ -45,3 +45,154 @@ def test_login_schema_valid():
     data = {"email": "teste_schema@example.com", "password": "123456"}
     response = client.post("/auth/login", json=data)
     assert response.status_code in [200, 400, 404]
+
+
+def test_login_rehashes_when_cost_policy_changes():
+    from passlib.context import CryptContext
+    from app import models
+    from tests.conftest import TestingSessionLocal
+
+    client.post("/auth/register", json={"name": "Rehash", "email": "rehash@example.com", "password": "123456"})
+    db = TestingSessionLocal()
+    user = db.query(models.User).filter(models.User.email == "rehash@example.com").first()
+    user.password = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=5).hash("123456")
+    db.commit()
+
+    response = client.post("/auth/login", json={"email": "rehash@example.com", "password": "123456"})
+    assert response.status_code == 200
+
+    db.refresh(user)
+    assert user.password.startswith("$2b$04$")
+    db.close()
+
+
+def test_login_returns_503_when_hash_pool_is_saturated(monkeypatch):
+    import threading
+    from app import hashing
+
+    busy = hashing.PasswordHasher(hashing.pwd_context, workers=1, queue_size=0)
+    started, release = threading.Event(), threading.Event()
+    worker = threading.Thread(target=busy._run, args=(lambda: started.set() or release.wait(),))
+    worker.start()
+    started.wait()
+    try:
+        monkeypatch.setattr(hashing, "hasher", busy)
+        response = client.post("/auth/login", json={"email": "teste@example.com", "password": "123456"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        worker.join()
+
+    # Com o pool livre de novo o login volta a funcionar
+    response = client.post("/auth/login", json={"email": "teste@example.com", "password": "123456"})
+    assert response.status_code == 200
+
+
+def test_hashing_routes_wait_for_the_pool_without_a_thread():
+    # Rotas síncronas esperando o bcrypt ocupariam threads do threadpool das demais rotas
+    import inspect
+    from app.routes import auth, users
+
+    for route in (auth.register_user, auth.login_user, users.create_user):
+        assert inspect.iscoroutinefunction(route)
+
+
+def _login(email):
+    client.post("/auth/register", json={"name": "Tokens", "email": email, "password": "123456"})
+    return client.post("/auth/login", json={"email": email, "password": "123456"}).json()
+
+
+def test_refresh_token_issues_new_pair():
+    pair = _login("refresh@example.com")
+    assert pair["token_type"] == "bearer" and pair["expires_in"] == 15 * 60
+
+    refreshed = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    assert refreshed.status_code == 200
+    headers = {"Authorization": f"Bearer {refreshed.json()['access_token']}"}
+    assert client.get("/transactions/summary", headers=headers).status_code == 200
+
+    # Uso único: o refresh token trocado não vale de novo; o novo vale
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+    pair = client.post("/auth/refresh", json={"refresh_token": refreshed.json()["refresh_token"]}).json()
+
+    # Cada token só vale no seu papel
+    assert client.post("/auth/refresh", json={"refresh_token": pair["access_token"]}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": "lixo"}).status_code == 401
+    refresh_as_bearer = {"Authorization": f"Bearer {pair['refresh_token']}"}
+    assert client.get("/transactions/summary", headers=refresh_as_bearer).status_code == 401
+
+    # Conta apagada não renova, nem quando outra conta é criada depois (o id não é reaproveitado)
+    user_id = client.get("/users/profile", headers=headers).json()["id"]
+    client.delete(f"/users/{user_id}")
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+    other = _login("refresh-nova@example.com")
+    assert client.get("/users/profile", headers={"Authorization": f"Bearer {other['access_token']}"}).json()["id"] > user_id
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+
+
+def test_refresh_token_issued_before_the_account_is_rejected():
+    # Bancos antigos podem ter reaproveitado ids: o token mais velho que a conta era de outra
+    from datetime import datetime, timedelta
+    from app import models
+    from tests.conftest import TestingSessionLocal
+
+    pair = _login("refresh-antigo@example.com")
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter(models.User.email == "refresh-antigo@example.com").one()
+        user.created_at = datetime.utcnow() + timedelta(minutes=5)
+        db.commit()
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+
+
+def test_access_token_is_verified_without_database(count_queries, monkeypatch):
+    from app import token
+
+    headers = {"Authorization": f"Bearer {_login('claims@example.com')['access_token']}"}
+    decoded = []
+    original_decode = token.jwt.decode
+    monkeypatch.setattr(token.jwt, "decode", lambda *args, **kwargs: decoded.append(1) or original_decode(*args, **kwargs))
+
+    count_queries.clear()
+    for _ in range(3):
+        assert client.get("/transactions/report", headers=headers).status_code == 200
+    assert not [q for q in count_queries if "users" in q]
+    # Verificado uma vez; as repetições vêm do cache
+    assert len(decoded) == 1
+
+
+def test_key_rotation_by_kid(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+    from jose import jwt
+    from app.token import tokens
+
+    user = client.get("/users/profile", headers={
+        "Authorization": f"Bearer {_login('rotacao@example.com')['access_token']}"
+    }).json()
+
+    def signed(key, headers):
+        claims = {"sub": str(user["id"]), "type": "access", "name": user["name"], "email": user["email"],
+                  "exp": datetime.now(timezone.utc) + timedelta(minutes=5)}
+        return {"Authorization": f"Bearer {jwt.encode(claims, key, algorithm='HS256', headers=headers)}"}
+
+    # Token assinado pela chave anterior continua valendo enquanto ela estiver no registro
+    old = signed("segredo-antigo", {"kid": "antiga"})
+    monkeypatch.setitem(tokens.keys, "antiga", "segredo-antigo")
+    assert client.get("/transactions/summary", headers=old).status_code == 200
+    # Retirada a chave, o token cai mesmo já estando no cache
+    monkeypatch.delitem(tokens.keys, "antiga")
+    assert client.get("/transactions/summary", headers=old).status_code == 401
+
+    # kid desconhecido, sem kid (tokens antigos) ou kid certo com a chave errada
+    assert client.get("/transactions/summary", headers=signed("x", {"kid": "outra"})).status_code == 401
+    assert client.get("/transactions/summary", headers=signed(tokens.keys[tokens.current_kid], {})).status_code == 401
+    assert client.get("/transactions/summary", headers=signed("x", {"kid": tokens.current_kid})).status_code == 401
+
+
+def test_expired_access_token_is_rejected(monkeypatch):
+    from datetime import timedelta
+    from app.token import tokens
+
+    monkeypatch.setattr(tokens, "access_ttl", timedelta(seconds=-1))
+    headers = {"Authorization": f"Bearer {_login('expirado@example.com')['access_token']}"}
+    assert client.get("/transactions/summary", headers=headers).status_code == 401
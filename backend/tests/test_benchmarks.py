@@ -0,0 +1,37 @@
+import json
+from benchmarks import load, startup
+
+
+def test_load_benchmark_smoke(tmp_path):
+    """Roda a suíte de carga em escala mínima e confere o formato do relatório"""
+    output = tmp_path / "bench.json"
+    load.main(["--rows", "300", "--users", "2", "--concurrency", "1", "4", "--requests", "8",
+               "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert report["meta"]["rows"] == 300
+    assert set(report["results"]) == {"1", "4"}
+    for endpoints in report["results"].values():
+        assert set(endpoints) == set(load.ENDPOINTS)
+        for stats in endpoints.values():
+            assert stats["errors"] == 0
+            assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+
+
+def test_compare_flags_p95_regressions():
+    baseline = {"results": {"8": {"list": {"p95_ms": 10.0}, "summary": {"p95_ms": 5.0}}}}
+    current = {"results": {"8": {"list": {"p95_ms": 15.0}, "summary": {"p95_ms": 5.5}, "login": {"p95_ms": 1.0}}}}
+    assert load.compare(baseline, current, max_regression=0.2) == ["c=8 list: p95 10.0 -> 15.0 ms (+50%)"]
+
+
+def test_startup_benchmark_smoke(tmp_path):
+    """Mede uma subida em processo novo e confere as fases do relatório"""
+    output = tmp_path / "startup.json"
+    startup.main(["--runs", "1", "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert report["meta"]["runs"] == 1
+    assert set(report["results"]) == set(startup.PHASES)
+    run = report["runs"][0]
+    assert 0 < run["import_ms"] < run["total_ms"]
+    assert run["first_request_ms"] > 0
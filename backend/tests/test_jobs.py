@@ -0,0 +1,253 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app import jobs, models
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+
+def teardown_module(module):
+    # Os workers consultam a fila periodicamente: parados, não entram nas contagens de queries dos outros testes
+    jobs.runner.stop(timeout=5)
+
+
+def login(email="tarefas@example.com"):
+    client.post("/auth/register", json={"name": "Tarefas", "email": email, "password": "123456"})
+    response = client.post("/auth/login", json={"email": email, "password": "123456"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def wait_for(job_id, headers, statuses=jobs.FINISHED, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Tarefa {job_id} não chegou a {statuses}: {job}")
+
+
+def paused_runner(monkeypatch, **kwargs):
+    """Runner próprio do teste, que só executa quando o teste chama start()."""
+    # O runner global (iniciado por outro teste) também consulta a fila e pegaria as tarefas deste
+    jobs.runner.stop(timeout=5)
+    runner = jobs.JobRunner(**{"workers": 1, "queue_size": 10, "results_dir": jobs.runner.results_dir,
+                               "session_factory": TestingSessionLocal, **kwargs})
+    start = runner.start
+    monkeypatch.setattr(runner, "start", lambda: None)
+    monkeypatch.setattr(jobs, "runner", runner)
+    return runner, start
+
+
+def test_export_report_and_rollups_jobs():
+    headers = login()
+    client.post("/transactions/bulk", headers=headers, json={"transactions": [
+        {"description": f"compra {i}", "amount": 10 + i, "type": "expense", "category": "Mercado",
+         "date": f"2024-0{1 + i % 3}-10T00:00:00"}
+        for i in range(30)
+    ]})
+
+    created = client.post("/jobs/", headers=headers, json={"kind": "export", "params": {"format": "csv"}})
+    assert created.status_code == 202
+    assert created.json()["status"] in ("queued", "running", "done")
+    job = wait_for(created.json()["id"], headers)
+    assert job["status"] == "done"
+    assert job["progress"] >= 1
+
+    result = client.get(f"/jobs/{job['id']}/result", headers=headers)
+    assert result.status_code == 200
+    assert result.headers["content-type"].startswith("text/csv")
+    assert 'filename="transacoes.csv"' in result.headers["content-disposition"]
+    lines = result.text.strip().splitlines()
+    assert lines[0] == "id,date,description,category,type,amount"
+    assert len(lines) == 31
+
+    params = {"group_by": "month,category", "type": "expense"}
+    job = client.post("/jobs/", headers=headers, json={"kind": "report", "params": params}).json()
+    assert wait_for(job["id"], headers)["status"] == "done"
+    report = client.get(f"/jobs/{job['id']}/result", headers=headers).json()
+    assert report == client.get("/transactions/report", params=params, headers=headers).json()
+
+    job = client.post("/jobs/", headers=headers, json={"kind": "rollups"}).json()
+    assert wait_for(job["id"], headers)["status"] == "done"
+    assert client.get(f"/jobs/{job['id']}/result", headers=headers).json() == {"divergences": 0}
+
+
+def test_job_validation_and_ownership():
+    headers = login()
+    assert client.post("/jobs/", headers=headers, json={"kind": "backup"}).status_code == 400
+    assert client.post("/jobs/", headers=headers, json={"kind": "export", "params": {"format": "xml"}}).status_code == 400
+    assert client.post("/jobs/", headers=headers, json={"kind": "report", "params": {"group_by": "day"}}).status_code == 400
+    assert client.post("/jobs/", headers=headers, json={"kind": "export", "params": {"limit": 1}}).status_code == 400
+
+    job = client.post("/jobs/", headers=headers, json={"kind": "rollups"}).json()
+    other = login("outro-tarefas@example.com")
+    assert client.get(f"/jobs/{job['id']}", headers=other).status_code == 404
+    assert client.get(f"/jobs/{job['id']}/result", headers=other).status_code == 404
+    assert client.post(f"/jobs/{job['id']}/cancel", headers=other).status_code == 404
+    assert client.get("/jobs/999999", headers=headers).status_code == 404
+
+
+def test_queue_limit_and_cancel_queued(monkeypatch):
+    headers = login()
+    runner, _ = paused_runner(monkeypatch, queue_size=1)
+
+    job = client.post("/jobs/", headers=headers, json={"kind": "rollups"}).json()
+    full = client.post("/jobs/", headers=headers, json={"kind": "rollups"})
+    assert full.status_code == 503
+    assert full.headers["Retry-After"] == "5"
+
+    assert client.get(f"/jobs/{job['id']}/result", headers=headers).status_code == 409
+    cancelled = client.post(f"/jobs/{job['id']}/cancel", headers=headers)
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "cancelled"
+    assert client.post(f"/jobs/{job['id']}/cancel", headers=headers).status_code == 409
+
+    # A vaga na fila foi liberada
+    assert client.post("/jobs/", headers=headers, json={"kind": "rollups"}).status_code == 202
+    with TestingSessionLocal() as db:
+        db.query(models.Job).filter(models.Job.status == "queued").update({"status": "cancelled"})
+        db.commit()
+
+
+def test_cancel_running_and_requeue_on_restart(monkeypatch):
+    headers = login()
+    runner, start = paused_runner(monkeypatch)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(db, user_id, params, context, out):
+        started.set()
+        while not release.wait(0.01):
+            context.checkpoint()
+        context.checkpoint()
+        out.write(b"{}")
+        return "application/json", "lento.json"
+
+    monkeypatch.setitem(jobs.KINDS, "slow", (lambda params: params, slow))
+
+    # Cancelamento no meio da execução: o worker para no próximo checkpoint
+    job = client.post("/jobs/", headers=headers, json={"kind": "slow"}).json()
+    start()
+    started.wait(5)
+    assert client.get(f"/jobs/{job['id']}", headers=headers).json()["status"] == "running"
+    assert client.post(f"/jobs/{job['id']}/cancel", headers=headers).json()["status"] == "cancelled"
+    assert wait_for(job["id"], headers)["status"] == "cancelled"
+
+    # Desligamento: a tarefa em andamento volta para a fila e é retomada ao subir de novo
+    started.clear()
+    job = client.post("/jobs/", headers=headers, json={"kind": "slow"}).json()
+    started.wait(5)
+    runner.stop(timeout=5)
+    assert client.get(f"/jobs/{job['id']}", headers=headers).json()["status"] == "queued"
+
+    release.set()
+    start()
+    job = wait_for(job["id"], headers)
+    assert job["status"] == "done"
+    runner.stop(timeout=5)
+    # A volta para a fila no desligamento não conta como tentativa
+    with TestingSessionLocal() as db:
+        assert db.get(models.Job, job["id"]).attempts == 1
+
+
+def test_replaced_worker_stops(monkeypatch):
+    headers = login()
+    runner, start = paused_runner(monkeypatch)
+    started, stopped = threading.Event(), threading.Event()
+
+    def slow(db, user_id, params, context, out):
+        started.set()
+        try:
+            while True:
+                time.sleep(0.01)
+                context.checkpoint()
+        finally:
+            stopped.set()
+
+    monkeypatch.setitem(jobs.KINDS, "slow", (lambda params: params, slow))
+    job = client.post("/jobs/", headers=headers, json={"kind": "slow"}).json()
+    start()
+    started.wait(5)
+
+    # Outro worker retomou a tarefa (heartbeat atrasado): o antigo perde a vez e não grava mais nada
+    with TestingSessionLocal() as db:
+        db.query(models.Job).filter(models.Job.id == job["id"]).update({"attempts": 2, "progress": 0})
+        db.commit()
+    assert stopped.wait(5)
+    runner.stop(timeout=5)
+    with TestingSessionLocal() as db:
+        replaced = db.get(models.Job, job["id"])
+        assert (replaced.status, replaced.attempts, replaced.progress) == ("running", 2, 0)
+        replaced.status = "cancelled"
+        db.commit()
+    assert not [name for name in os.listdir(runner.results_dir) if name.startswith(f"{job['id']}-")]
+
+
+def test_stale_running_job_is_recovered(monkeypatch):
+    headers = login()
+    runner, start = paused_runner(monkeypatch)
+    job = client.post("/jobs/", headers=headers, json={"kind": "rollups"}).json()
+
+    # Processo morto no meio da tarefa: "running" sem heartbeat recente
+    with TestingSessionLocal() as db:
+        db.query(models.Job).filter(models.Job.id == job["id"]).update({
+            "status": "running", "attempts": 1, "heartbeat_at": datetime.utcnow() - timedelta(hours=1)
+        })
+        db.commit()
+
+    start()
+    assert wait_for(job["id"], headers)["status"] == "done"
+    runner.stop(timeout=5)
+    with TestingSessionLocal() as db:
+        assert db.get(models.Job, job["id"]).attempts == 2
+
+
+def test_deleting_user_removes_jobs_and_results():
+    headers = login("apagar-tarefas@example.com")
+    job = client.post("/jobs/", headers=headers, json={"kind": "rollups"}).json()
+    assert wait_for(job["id"], headers)["status"] == "done"
+    with TestingSessionLocal() as db:
+        path = jobs.runner.result_path(db.get(models.Job, job["id"]))
+    assert os.path.exists(path)
+
+    user_id = client.get("/users/profile", headers=headers).json()["id"]
+    assert client.delete(f"/users/{user_id}").status_code == 200
+    with TestingSessionLocal() as db:
+        assert db.get(models.Job, job["id"]) is None
+    assert not os.path.exists(path)
+
+
+def test_cleanup_removes_old_results(monkeypatch):
+    headers = login()
+    runner, _ = paused_runner(monkeypatch)
+    old, recent = (client.post("/jobs/", headers=headers, json={"kind": "rollups"}).json() for _ in range(2))
+    finished = {old["id"]: datetime.utcnow() - timedelta(days=2), recent["id"]: datetime.utcnow()}
+    with TestingSessionLocal() as db:
+        for job_id, finished_at in finished.items():
+            db.query(models.Job).filter(models.Job.id == job_id).update({
+                "status": "done", "finished_at": finished_at, "result_file": f"{job_id}-1.result"
+            })
+        db.commit()
+    # Arquivos velhos pela data de modificação: só a tarefa expirada decide o que sai
+    stale = time.time() - 3 * 86400
+    for name in (f"{old['id']}-1.result", f"{recent['id']}-1.result", f"{old['id']}-2.result.part"):
+        path = os.path.join(runner.results_dir, name)
+        with open(path, "wb") as f:
+            f.write(b"{}")
+        os.utime(path, (stale, stale))
+
+    runner.cleanup()
+    with TestingSessionLocal() as db:
+        assert db.get(models.Job, old["id"]) is None
+        assert db.get(models.Job, recent["id"]) is not None
+    assert not os.path.exists(os.path.join(runner.results_dir, f"{old['id']}-1.result"))
+    assert not os.path.exists(os.path.join(runner.results_dir, f"{old['id']}-2.result.part"))
+    assert client.get(f"/jobs/{recent['id']}/result", headers=headers).status_code == 200
+
+    # Arquivo sumido (ex.: apagado à mão): 410 em vez de erro 500
+    os.remove(os.path.join(runner.results_dir, f"{recent['id']}-1.result"))
+    assert client.get(f"/jobs/{recent['id']}/result", headers=headers).status_code == 410
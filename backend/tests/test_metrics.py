@@ -0,0 +1,88 @@
+import os
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app import metrics
+from app.database import get_db
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint_reports_latency_and_queries():
+    client.post("/auth/register", json={"name": "Métricas", "email": "metricas@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "metricas@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    client.get("/transactions/summary", headers=headers)
+    client.get("/transactions/999999", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    # Rotas com parâmetros aparecem pelo caminho declarado, não pela URL
+    assert 'route="/transactions/{transaction_id}",status="404"' in body
+    assert "route=\"/transactions/999999\"" not in body
+    pid = f'pid="{os.getpid()}"'
+    assert f"moneytrack_http_requests_in_flight{{{pid}}} 1" in body  # a própria requisição de /metrics
+
+    queries = [
+        line for line in body.splitlines()
+        if line.startswith(f'moneytrack_db_queries_total{{method="GET",route="/transactions/summary",{pid}}}')
+    ]
+    assert queries and float(queries[0].split()[-1]) >= 2  # versão dos dados + agregação
+
+
+def test_server_timing_header_when_enabled():
+    local_app = FastAPI()
+
+    @local_app.get("/ping")
+    def ping(db=Depends(get_db)):
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+        return {"ok": True}
+
+    local_app.dependency_overrides = app.dependency_overrides
+    local_app.add_middleware(metrics.MetricsMiddleware, server_timing=True)
+
+    response = TestClient(local_app).get("/ping")
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'desc="2 queries"' in timing
+
+    # Desligado por padrão
+    assert "server-timing" not in client.get("/").headers
+
+
+def test_diagnostics_logs_slow_queries_and_n_plus_one(monkeypatch, caplog):
+    from app import diagnostics
+    from app.config import settings
+
+    local_app = FastAPI()
+
+    @local_app.get("/items/{item_id}")
+    def items(item_id: int, db=Depends(get_db)):
+        for i in range(8):
+            db.execute(text("SELECT :i"), {"i": i})
+        return {"ok": True}
+
+    local_app.dependency_overrides = app.dependency_overrides
+    local_app.add_middleware(metrics.MetricsMiddleware)
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 5)
+    diagnostics.enable()
+    try:
+        with caplog.at_level("WARNING", logger="moneytrack.sql"):
+            TestClient(local_app).get("/items/7")
+    finally:
+        diagnostics.disable()
+
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Query lenta")]
+    assert len(slow) == 8
+    assert "GET /items/{item_id}" in slow[0] and "SELECT ?" in slow[0] and "(0,)" in slow[0]
+
+    n_plus_one = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Provável N+1")]
+    assert n_plus_one == ["Provável N+1 em GET /items/{item_id}: o mesmo statement rodou mais de 5 vezes: SELECT ?"]
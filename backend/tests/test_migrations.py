@@ -0,0 +1,149 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect, text
+from app.main import app
+from app import migrations
+from tests.conftest import engine
+
+client = TestClient(app)
+
+# Esquema do moneytrack.db anterior aos índices compostos
+OLD_SCHEMA = [
+    """CREATE TABLE users (id INTEGER NOT NULL, name VARCHAR(255) NOT NULL, email VARCHAR(255) NOT NULL,
+       password VARCHAR(255) NOT NULL, created_at DATETIME, PRIMARY KEY (id))""",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    """CREATE TABLE transactions (id INTEGER NOT NULL, description VARCHAR(255) NOT NULL, amount FLOAT NOT NULL,
+       type VARCHAR(50) NOT NULL, date DATETIME, created_at DATETIME, user_id INTEGER, category VARCHAR(50),
+       PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))""",
+    "CREATE INDEX ix_transactions_id ON transactions (id)",
+]
+
+
+def test_upgrade_existing_database(tmp_path):
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    with old_engine.begin() as conn:
+        for ddl in OLD_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO users (id, name, email, password) VALUES (1, 'a', 'a@a.com', 'x')"))
+        conn.execute(text(
+            "INSERT INTO transactions (id, description, amount, type, user_id) "
+            "VALUES (1, 'centavos', 0.1, 'expense', 1), (2, 'quebrado', 19.99, 'income', 1), "
+            "(3, 'meio centavo', 1.005, 'expense', 1), (4, 'float', 0.285, 'expense', 1), "
+            "(5, 'de conta apagada', 1, 'expense', 7)"
+        ))
+
+    applied = migrations.upgrade(old_engine)
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+
+    indexes = {ix["name"] for ix in inspect(old_engine).get_indexes("transactions")}
+    assert {"ix_transactions_user_date", "ix_transactions_user_type_date"} <= indexes
+
+    with old_engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, amount_cents FROM transactions ORDER BY id")).all()
+    # Mesmo arredondamento do app (models.to_cents), não o do float: 1.005 -> 101, 0.285 -> 29
+    assert rows == [(1, 10), (2, 1999), (3, 101), (4, 29), (5, 100)]
+    assert "amount" not in {c["name"] for c in inspect(old_engine).get_columns("transactions")}
+
+    # users com AUTOINCREMENT, sem reaproveitar nem o id 7 (conta apagada com transações)
+    with old_engine.begin() as conn:
+        assert conn.execute(text("SELECT email FROM users")).scalars().all() == ["a@a.com"]
+        assert {ix["name"] for ix in inspect(conn).get_indexes("users")} >= {"ix_users_email"}
+        conn.execute(text("INSERT INTO users (name, email, password) VALUES ('b', 'b@b.com', 'x')"))
+        assert conn.execute(text("SELECT max(id) FROM users")).scalar() == 8
+
+    # Rodar de novo não faz nada
+    assert migrations.upgrade(old_engine) == []
+
+
+def test_health_readiness_tracks_database_state(tmp_path, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from app.database import get_db
+
+    assert client.get("/health/live").json() == {"status": "ok"}
+    assert client.get("/health/ready").json() == {"status": "ok", "database": "ok"}
+
+    # Banco novo, ainda não inicializado: fora do balanceador até o init_db
+    new_engine = create_engine(f"sqlite:///{tmp_path / 'novo.db'}")
+    NewSession = sessionmaker(bind=new_engine)
+
+    def new_db():
+        with NewSession() as db:
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, new_db)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["pending_migrations"] == [version for version, _, _ in migrations.MIGRATIONS]
+
+    migrations.init_db(new_engine)
+    assert client.get("/health/ready").status_code == 200
+    assert migrations.init_db(new_engine) == []
+
+    # Banco inacessível
+    broken = create_engine(f"sqlite:///{tmp_path / 'inexistente' / 'x.db'}")
+    monkeypatch.setattr(NewSession, "kw", {**NewSession.kw, "bind": broken})
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["database"] == "unreachable"
+
+
+def _query_plans(route, headers, params=None, table="transactions"):
+    """Executa a rota capturando o SQL emitido e devolve o EXPLAIN QUERY PLAN de cada SELECT."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and f"FROM {table}" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(route, params=params, headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        return [
+            " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            for statement, parameters in captured
+        ]
+
+
+def test_listing_and_summary_use_indexes():
+    client.post("/auth/register", json={"name": "Plano", "email": "plano@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "plano@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    items = [{"description": "x", "amount": 1, "type": "expense", "date": "2024-01-01T00:00:00"}]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    plans = _query_plans("/transactions/", headers)
+    assert plans and all("USING INDEX ix_transactions_user_date" in plan for plan in plans)
+    assert all("TEMP B-TREE" not in plan for plan in plans)
+
+    plans = _query_plans("/transactions/history", headers)
+    assert plans and all("USING INDEX ix_transactions_user_date" in plan for plan in plans)
+
+    # Com recorte de datas o resumo agrega direto em transactions, por um dos índices compostos
+    plans = _query_plans("/transactions/summary", headers, params={"start_date": "2000-01-01"})
+    assert plans and all("USING INDEX ix_transactions_user_" in plan for plan in plans)
+
+    # Sem recorte de datas o resumo lê só os agregados mensais
+    assert _query_plans("/transactions/summary", headers) == []
+    plans = _query_plans("/transactions/summary", headers, table="monthly_rollups")
+    assert plans and all("USING INDEX" in plan for plan in plans)
+
+
+def test_amounts_are_exact_integer_cents():
+    client.post("/auth/register", json={"name": "Centavos", "email": "centavos@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "centavos@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    items = [{"description": "dez centavos", "amount": 0.1, "type": "expense"} for _ in range(10)]
+    ids = client.post("/transactions/bulk", json={"transactions": items}, headers=headers).json()["ids"]
+
+    # Em float, 0.1 somado dez vezes daria 0.9999999999999999
+    assert client.get("/transactions/summary", headers=headers).json()["total_expense"] == 1.0
+    assert client.get(f"/transactions/{ids[0]}", headers=headers).json()["amount"] == 0.1
+
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT typeof(amount_cents), amount_cents FROM transactions WHERE id = :id"),
+                              {"id": ids[0]}).one()
+    assert tuple(stored) == ("integer", 10)
@@ -0,0 +1,50 @@
+"""Número máximo de queries por rota: uma regressão (ex.: N+1) faz o CI falhar."""
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+# (método, caminho, corpo, máximo de queries). A autenticação não consulta o banco (claims do
+# token); o perfil sai do cache de cadastro, aquecido no fixture
+BUDGETS = [
+    ("POST", "/transactions/", {"description": "café", "amount": 5, "type": "expense", "category": "Café"}, 6),
+    ("GET", "/transactions/", None, 2),
+    ("GET", "/transactions/?all=true", None, 2),
+    ("GET", "/transactions/history", None, 2),
+    ("GET", "/transactions/summary", None, 2),
+    ("GET", "/transactions/summary?start_date=2024-01-01", None, 2),
+    ("GET", "/transactions/report?group_by=month,category", None, 1),
+    ("GET", "/transactions/{id}", None, 1),
+    ("PUT", "/transactions/{id}", {"description": "café coado"}, 8),
+    ("DELETE", "/transactions/{id}", None, 5),
+    ("GET", "/users/profile", None, 0),
+]
+
+
+@pytest.fixture(scope="module")
+def headers():
+    client.post("/auth/register", json={"name": "Orçamento", "email": "orcamento@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "orcamento@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    # Volume suficiente para um N+1 aparecer
+    items = [
+        {"description": f"item {i}", "amount": i + 1, "type": "expense", "category": f"C{i % 4}",
+         "date": f"2024-0{1 + i % 6}-10T00:00:00"}
+        for i in range(50)
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+    client.get("/users/profile", headers=headers)  # aquece o cache de cadastro (oauth2.user_cache) do perfil
+    return headers
+
+
+@pytest.mark.parametrize("method,path,body,limit", BUDGETS, ids=[f"{m} {p}" for m, p, _, _ in BUDGETS])
+def test_route_query_budget(method, path, body, limit, headers, max_queries):
+    if "{id}" in path:
+        created = client.post("/transactions/", json={"description": "alvo", "amount": 1, "type": "income"},
+                              headers=headers).json()
+        path = path.replace("{id}", str(created["id"]))
+
+    with max_queries(limit, f"{method} {path}"):
+        response = client.request(method, path, json=body, headers=headers)
+    assert response.status_code < 400
@@ -0,0 +1,89 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app import charts
+
+client = TestClient(app)
+
+
+def login():
+    client.post("/auth/register", json={"name": "Gráficos", "email": "graficos@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "graficos@example.com", "password": "123456"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_chart_png_and_svg():
+    headers = login()
+
+    # Sem transações o gráfico sai com o aviso de período vazio
+    empty = client.get("/reports/chart/balance.png", headers=headers)
+    assert empty.status_code == 200
+    assert empty.content.startswith(b"\x89PNG")
+
+    client.post("/transactions/bulk", headers=headers, json={"transactions": [
+        {"description": "salário", "amount": 5000, "type": "income", "category": "Salário", "date": "2024-01-05T00:00:00"},
+        {"description": "mercado", "amount": 800, "type": "expense", "category": "Mercado", "date": "2024-01-10T00:00:00"},
+        {"description": "aluguel", "amount": 1500, "type": "expense", "category": "Casa", "date": "2024-02-01T00:00:00"},
+    ]})
+
+    for kind in charts.KINDS:
+        png = client.get(f"/reports/chart/{kind}.png", headers=headers)
+        assert png.status_code == 200
+        assert png.headers["content-type"] == "image/png"
+        assert png.content.startswith(b"\x89PNG")
+
+        svg = client.get(f"/reports/chart/{kind}.svg", headers=headers)
+        assert svg.status_code == 200
+        assert svg.headers["content-type"].startswith("image/svg+xml")
+        assert b"<svg" in svg.content
+
+    assert client.get("/reports/chart/radar.png", headers=headers).status_code == 404
+    assert client.get("/reports/chart/monthly.gif", headers=headers).status_code == 404
+    assert client.get("/reports/chart/category.png", params={"type": "x"}, headers=headers).status_code == 400
+
+
+def test_chart_cache_and_etag(count_queries, monkeypatch):
+    headers = login()
+    first = client.get("/reports/chart/category.svg", headers=headers)
+    etag = first.headers["ETag"]
+
+    # Repetição: só a consulta da versão dos dados, sem agregar nem renderizar
+    def fail(*args):
+        raise AssertionError("não deveria renderizar de novo")
+
+    monkeypatch.setattr(charts, "render", fail)
+    count_queries.clear()
+    again = client.get("/reports/chart/category.svg", headers=headers)
+    assert again.content == first.content
+    assert len(count_queries) == 1
+
+    response = client.get("/reports/chart/category.svg", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    monkeypatch.undo()
+
+    # Uma escrita muda a versão dos dados: chave, ETag e imagem novas
+    client.post("/transactions/", headers=headers, json={
+        "description": "cinema", "amount": 40, "type": "expense", "category": "Lazer", "date": "2024-03-01T00:00:00"
+    })
+    changed = client.get("/reports/chart/category.svg", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert b"Lazer" in changed.content and b"Lazer" not in first.content
+
+
+def test_chart_returns_503_when_render_pool_is_saturated(monkeypatch):
+    import threading
+
+    headers = login()
+    busy = charts.ChartRenderer(workers=1, queue_size=0)
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(charts, "render", lambda *args: started.set() or release.wait())
+    pending = busy._submit("monthly", "png", [])
+    started.wait()
+    try:
+        monkeypatch.setattr(charts, "renderer", busy)
+        response = client.get("/reports/chart/monthly.png", params={"start_date": "2030-01-01"}, headers=headers)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+    finally:
+        release.set()
+        pending.result()
@@ -0,0 +1,101 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app import models, rollups
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+
+def _headers():
+    client.post("/auth/register", json={"name": "Agregados", "email": "agregados@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "agregados@example.com", "password": "123456"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _check():
+    db = TestingSessionLocal()
+    try:
+        return rollups.check(db)
+    finally:
+        db.close()
+
+
+def test_rollups_follow_every_write_path():
+    headers = _headers()
+
+    created = client.post("/transactions/", json={
+        "description": "salário", "amount": 3000, "type": "income", "category": "Salário",
+        "date": "2024-05-05T00:00:00"
+    }, headers=headers).json()
+    items = [
+        {"description": f"conta {i}", "amount": 10.1 * (i + 1), "type": "expense",
+         "category": "Contas" if i % 2 else None, "date": f"2024-0{4 + i % 3}-10T00:00:00"}
+        for i in range(9)
+    ]
+    ids = client.post("/transactions/bulk", json={"transactions": items}, headers=headers).json()["ids"]
+    assert _check() == []
+
+    client.put(f"/transactions/{created['id']}", json={"amount": 3100.5, "date": "2024-06-01T00:00:00"}, headers=headers)
+    client.put(f"/transactions/{ids[0]}", json={"category": "Mercado", "type": "income"}, headers=headers)
+    assert _check() == []
+
+    client.delete(f"/transactions/{ids[1]}", headers=headers)
+    client.delete("/transactions/", params={"before": "2024-05-01T00:00:00"}, headers=headers)
+    assert _check() == []
+
+    # Lendo dos agregados ou das transações brutas, o relatório é o mesmo
+    params = {"group_by": "month,type,category"}
+    from_rollups = client.get("/transactions/report", params=params, headers=headers).json()
+    from_raw = client.get(
+        "/transactions/report", params={**params, "start_date": "1900-01-01"}, headers=headers
+    ).json()
+    assert from_rollups == from_raw
+    assert from_rollups["buckets"]
+
+
+def test_rollups_rebuild_repairs_drift():
+    _headers()
+    db = TestingSessionLocal()
+    try:
+        db.query(models.MonthlyRollup).update({models.MonthlyRollup.count: 999})
+        db.commit()
+        assert rollups.check(db) != []
+
+        rollups.rebuild(db)
+        db.commit()
+        assert rollups.check(db) == []
+    finally:
+        db.close()
+
+
+def test_concurrent_writes_do_not_double_count():
+    """Duas sessões leem a mesma linha; só a escrita que a encontra como foi lida mexe nos agregados"""
+    headers = _headers()
+    created = client.post("/transactions/", json={
+        "description": "disputada", "amount": 25, "type": "expense", "category": "Corrida",
+        "date": "2024-07-10T00:00:00"
+    }, headers=headers).json()
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        load = lambda db: db.get(models.Transaction, created["id"], populate_existing=True)  # noqa: E731
+
+        # Editada por uma sessão depois que a outra leu: a segunda só aplica depois de reler
+        stale = load(second)
+        assert rollups.update_transaction(first, load(first), {"amount": 30})
+        first.commit()
+        assert not rollups.update_transaction(second, stale, {"category": "Outra"})
+        assert rollups.update_transaction(second, load(second), {"category": "Outra"})
+        second.commit()
+        assert _check() == []
+
+        # Apagada pelas duas: só a primeira desconta
+        stale = load(second)
+        assert rollups.delete_transaction(first, load(first))
+        first.commit()
+        assert not rollups.delete_transaction(second, stale)
+        second.commit()
+        assert _check() == []
+    finally:
+        first.close()
+        second.close()
+    assert client.delete(f"/transactions/{created['id']}", headers=headers).status_code == 404
@@ -149,6 +149,10 @@ def test_update_transaction(client):
     assert get_response.status_code == 200
     assert get_response.json()["description"] == "new desc"
 
+    # date (e as colunas obrigatórias) não aceitam null; category pode ser limpa
+    assert client.put(f"/transactions/{transaction_id}", json={"date": None}, headers=headers).status_code == 422
+    assert client.put(f"/transactions/{transaction_id}", json={"category": None}, headers=headers).json()["category"] is None
+
 def test_delete_transaction():
 
     login_data = {"email": "nikson@example.com", "password": "123456"}
@@ -170,4 +174,482 @@ def test_delete_transaction():
     assert response.status_code == 204
 
     get_response = client.get(f"/transactions/{transaction_id}", headers=headers)
-    assert get_response.status_code == 404
\ No newline at end of file
+    assert get_response.status_code == 404
+
+def test_create_transactions_bulk():
+    login_data = {"email": "nikson@example.com", "password": "123456"}
+    response = client.post("/auth/login", json=login_data)
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    items = [
+        {"description": f"lote {i}", "amount": 10 + i, "type": "expense", "category": "Lote",
+         "date": "2024-01-15T00:00:00"}
+        for i in range(5)
+    ]
+    response = client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 5
+    assert data["errors"] == []
+    assert data["ids"] == sorted(data["ids"])
+
+    for i, transaction_id in enumerate(data["ids"]):
+        get_response = client.get(f"/transactions/{transaction_id}", headers=headers)
+        assert get_response.json()["description"] == f"lote {i}"
+
+
+def test_create_transactions_bulk_atomic_rejects_all():
+    login_data = {"email": "nikson@example.com", "password": "123456"}
+    response = client.post("/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    before = len(client.get("/transactions/", headers=headers).json())
+    items = [
+        {"description": "ok", "amount": 1, "type": "income"},
+        {"description": "sem valor", "type": "income"},
+        {"description": "tipo errado", "amount": 1, "type": "outro"},
+    ]
+    response = client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+    assert response.status_code == 422
+    errors = response.json()["detail"]["errors"]
+    assert [e["index"] for e in errors] == [1, 2]
+    assert len(client.get("/transactions/", headers=headers).json()) == before
+
+
+def test_create_transactions_bulk_partial():
+    login_data = {"email": "nikson@example.com", "password": "123456"}
+    response = client.post("/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    items = [
+        {"description": "parcial 1", "amount": 1, "type": "income"},
+        {"description": "tipo errado", "amount": 1, "type": "outro"},
+        {"description": "parcial 2", "amount": 2, "type": "expense"},
+    ]
+    response = client.post(
+        "/transactions/bulk", json={"transactions": items, "atomic": False}, headers=headers
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 2
+    assert data["ids"][1] is None
+    assert [e["index"] for e in data["errors"]] == [1]
+    assert client.get(f"/transactions/{data['ids'][2]}", headers=headers).json()["description"] == "parcial 2"
+
+
+def test_delete_transactions_by_filter():
+    login_data = {"email": "nikson@example.com", "password": "123456"}
+    response = client.post("/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    items = [
+        {"description": "antiga 1", "amount": 5, "type": "expense", "category": "Limpeza", "date": "2019-03-01T00:00:00"},
+        {"description": "antiga 2", "amount": 6, "type": "expense", "category": "Limpeza", "date": "2019-04-01T00:00:00"},
+        {"description": "recente", "amount": 7, "type": "expense", "category": "Limpeza", "date": "2030-01-01T00:00:00"},
+    ]
+    ids = client.post("/transactions/bulk", json={"transactions": items}, headers=headers).json()["ids"]
+
+    # Sem filtros a rota recusa apagar tudo
+    assert client.delete("/transactions/", headers=headers).status_code == 400
+
+    params = {"before": "2020-01-01T00:00:00", "category": "Limpeza"}
+    response = client.delete("/transactions/", params={**params, "dry_run": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 2, "dry_run": True}
+    assert client.get(f"/transactions/{ids[0]}", headers=headers).status_code == 200
+
+    response = client.delete("/transactions/", params=params, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 2
+    assert client.get(f"/transactions/{ids[0]}", headers=headers).status_code == 404
+    assert client.get(f"/transactions/{ids[2]}", headers=headers).status_code == 200
+
+
+def test_transaction_summary_constant_queries(count_queries):
+    """O resumo é uma única agregação: o número de queries não cresce com o número de transações"""
+    client.post("/auth/register", json={"name": "Resumo", "email": "resumo@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "resumo@example.com", "password": "123456"})
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    items = [
+        {"description": "salário", "amount": 1000, "type": "income", "category": "Salário", "date": "2024-01-05T00:00:00"},
+        {"description": "mercado", "amount": 250.5, "type": "expense", "category": "Mercado", "date": "2024-01-10T00:00:00"},
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    count_queries.clear()
+    response = client.get("/transactions/summary", headers=headers)
+    assert response.json() == {"total_income": 1000.0, "total_expense": 250.5, "balance": 749.5}
+    queries_small = len(count_queries)
+
+    many = [
+        {"description": f"café {i}", "amount": 1, "type": "expense", "category": "Café", "date": "2024-02-01T00:00:00"}
+        for i in range(200)
+    ]
+    client.post("/transactions/bulk", json={"transactions": many}, headers=headers)
+
+    count_queries.clear()
+    response = client.get("/transactions/summary", headers=headers)
+    assert response.json()["total_expense"] == 450.5
+    assert len(count_queries) == queries_small
+
+    # Filtros de período e categoria
+    response = client.get(
+        "/transactions/summary",
+        params={"start_date": "2024-01-01", "end_date": "2024-01-31", "category": "Mercado"},
+        headers=headers,
+    )
+    assert response.json() == {"total_income": 0, "total_expense": 250.5, "balance": -250.5}
+
+
+def test_transactions_cursor_pagination():
+    client.post("/auth/register", json={"name": "Paginação", "email": "paginas@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "paginas@example.com", "password": "123456"})
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Datas repetidas para garantir o desempate pelo id
+    items = [
+        {"description": f"item {i}", "amount": i, "type": "expense", "date": f"2024-03-{1 + i // 3:02d}T00:00:00"}
+        for i in range(25)
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    everything = client.get("/transactions/", params={"all": True}, headers=headers)
+    assert "X-Next-Cursor" not in everything.headers
+    expected = [t["id"] for t in everything.json()]
+    assert len(expected) == 25
+
+    for route in ("/transactions/", "/transactions/history"):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(route, params=params, headers=headers)
+            assert response.status_code == 200
+            assert len(response.json()) <= 10
+            seen += [t["id"] for t in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected
+
+    response = client.get("/transactions/", params={"cursor": "invalido"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_transactions_report():
+    client.post("/auth/register", json={"name": "Relatório", "email": "relatorio@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "relatorio@example.com", "password": "123456"})
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    items = [
+        {"description": "aluguel", "amount": 1200, "type": "expense", "category": "Moradia", "date": "2024-01-05T00:00:00"},
+        {"description": "mercado", "amount": 300.25, "type": "expense", "category": "Mercado", "date": "2024-01-20T00:00:00"},
+        {"description": "mercado", "amount": 199.75, "type": "expense", "category": "Mercado", "date": "2024-02-03T00:00:00"},
+        {"description": "salário", "amount": 5000, "type": "income", "category": "Salário", "date": "2024-02-05T00:00:00"},
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    response = client.get(
+        "/transactions/report", params={"group_by": "month,category", "type": "expense"}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["group_by"] == ["month", "category"]
+    assert data["buckets"] == [
+        {"month": "2024-01", "category": "Mercado", "total": 300.25, "count": 1},
+        {"month": "2024-01", "category": "Moradia", "total": 1200.0, "count": 1},
+        {"month": "2024-02", "category": "Mercado", "total": 199.75, "count": 1},
+    ]
+
+    response = client.get("/transactions/report", params={"group_by": "type"}, headers=headers)
+    assert response.json()["buckets"] == [
+        {"type": "expense", "total": 1700.0, "count": 3},
+        {"type": "income", "total": 5000.0, "count": 1},
+    ]
+
+    response = client.get("/transactions/report", params={"group_by": "dia"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_export_transactions_streaming():
+    client.post("/auth/register", json={"name": "Exportação", "email": "export@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "export@example.com", "password": "123456"})
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    items = [
+        {"description": f"linha {i}, com vírgula", "amount": i + 0.5, "type": "expense" if i % 2 else "income",
+         "category": "Export", "date": f"2024-01-{1 + i % 28:02d}T00:00:00"}
+        for i in range(2500)
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    import csv, io, json
+    response = client.get("/transactions/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 2500
+    assert rows[0].keys() == {"id", "date", "description", "category", "type", "amount"}
+    assert {r["description"] for r in rows} == {i["description"] for i in items}
+
+    response = client.get("/transactions/export", params={"format": "ndjson", "type": "income"}, headers=headers)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1250
+    assert all(line["type"] == "income" for line in lines)
+    assert lines[0]["amount"] == next(i["amount"] for i in items if i["description"] == lines[0]["description"])
+
+    assert client.get("/transactions/export", params={"format": "xml"}, headers=headers).status_code == 422
+
+
+def test_import_statement_csv_and_ofx():
+    client.post("/auth/register", json={"name": "Importação", "email": "import@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "import@example.com", "password": "123456"})
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # CSV no formato de banco brasileiro: ";" como separador, vírgula decimal e data dd/mm/aaaa
+    lines = ["\ufeffData;Descrição;Valor;Categoria"]
+    lines += [f"{1 + i % 28:02d}/03/2024;Compra {i};-1.234,5{i % 10};Mercado" for i in range(2500)]
+    lines.insert(10, "31/02/2024;Data impossível;-10,00;Mercado")
+    lines.insert(20, "05/03/2024;Sem valor;;Mercado")
+    lines.append("10/03/2024;Salário;5000,00;Trabalho")
+    body = ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+    response = client.post(
+        "/transactions/import", params={"batch_size": 1000},
+        files={"file": ("extrato.csv", body, "text/csv")}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 2501
+    assert data["failed"] == 2
+    assert [error["line"] for error in data["errors"]] == [11, 21]
+
+    summary = client.get("/transactions/summary", params={"category": "Trabalho"}, headers=headers).json()
+    assert summary["total_income"] == 5000.0
+    expense = client.get("/transactions/summary", params={"category": "Mercado"}, headers=headers).json()
+    assert expense["total_expense"] == round(sum(1234.5 + (i % 10) / 100 for i in range(2500)), 2)
+
+    ofx = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240415120000[-3:BRT]<TRNAMT>-42.90<MEMO>Padaria</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240416<TRNAMT>150.00<NAME>Pix recebido</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240417<MEMO>Sem valor</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+    response = client.post(
+        "/transactions/import", files={"file": ("extrato.ofx", ofx.encode("latin-1"), "application/x-ofx")},
+        headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["imported"], data["failed"]) == (2, 1)
+    assert data["errors"][0]["line"] == 3
+
+    history = client.get("/transactions/", params={"start_date": "2024-04-01"}, headers=headers).json()
+    assert {(t["description"], t["type"], t["amount"]) for t in history} == {
+        ("Padaria", "expense", 42.9), ("Pix recebido", "income", 150.0)
+    }
+
+    # Acentos fora do UTF-8: OFX com CHARSET:1252 declarado e CSV do Excel em Windows-1252
+    ofx_1252 = ofx.replace("DATA:OFXSGML", "DATA:OFXSGML\nENCODING:USASCII\nCHARSET:1252").replace(
+        "Padaria", "PADARIA SÃO JOÃO")
+    client.post("/transactions/import", files={"file": ("extrato.ofx", ofx_1252.encode("cp1252"), "application/x-ofx")},
+                headers=headers)
+    csv_1252 = "Data;Descrição;Valor\r\n10/05/2024;Café – açúcar;-7,50\r\n".encode("cp1252")
+    client.post("/transactions/import", files={"file": ("extrato.csv", csv_1252, "text/csv")}, headers=headers)
+    history = client.get("/transactions/", params={"start_date": "2024-04-15", "type": "expense"}, headers=headers).json()
+    descriptions = {t["description"] for t in history}
+    assert {"PADARIA SÃO JOÃO", "Café – açúcar"} <= descriptions
+
+    # Milhar no formato americano ou brasileiro; separador único com 3 dígitos é recusado
+    csv_amounts = "Data;Descrição;Valor\r\n" + "".join(
+        f"10/06/2024;{description};{amount}\r\n" for description, amount in (
+            ("americano", "-1,234.56"), ("brasileiro", "-1.234,56"), ("milhões", "-1.234.567"),
+            ("centavos", "-0,125"), ("ambíguo ponto", "-1.234"), ("ambíguo vírgula", "-1,234"),
+            ("grupo errado", "-12.34,56"),
+        )
+    )
+    data = client.post("/transactions/import", files={"file": ("valores.csv", csv_amounts.encode(), "text/csv")},
+                       headers=headers).json()
+    assert (data["imported"], data["failed"]) == (4, 3)
+    assert [error["line"] for error in data["errors"]] == [6, 7, 8]
+    history = client.get("/transactions/", params={"start_date": "2024-06-01"}, headers=headers).json()
+    assert {t["description"]: t["amount"] for t in history} == {
+        "americano": 1234.56, "brasileiro": 1234.56, "milhões": 1234567.0, "centavos": 0.13
+    }
+
+
+def test_read_endpoints_etag_not_modified(count_queries):
+    client.post("/auth/register", json={"name": "ETag", "email": "etag@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "etag@example.com", "password": "123456"})
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    item = {"description": "aluguel", "amount": 900, "type": "expense", "category": "Casa", "date": "2024-05-01T00:00:00"}
+    client.post("/transactions/", json=item, headers=headers)
+
+    for path in ("/transactions/", "/transactions/summary", "/transactions/history"):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        # Dados inalterados: 304 sem corpo, e só a consulta da versão vai ao banco
+        count_queries.clear()
+        response = client.get(path, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert len(count_queries) == 1
+        assert "data_version" in count_queries[0]
+
+    # Parâmetros diferentes geram outra ETag
+    response = client.get("/transactions/", headers=headers)
+    etag = response.headers["etag"]
+    filtered = client.get("/transactions/", params={"type": "income"}, headers={**headers, "If-None-Match": etag})
+    assert filtered.status_code == 200
+    assert filtered.headers["etag"] != etag
+
+    # Qualquer escrita muda a versão e invalida as ETags anteriores
+    created = client.post("/transactions/", json={**item, "amount": 50}, headers=headers).json()
+    response = client.get("/transactions/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    etag = response.headers["etag"]
+
+    client.put(f"/transactions/{created['id']}", json={"description": "conta de luz"}, headers=headers)
+    assert client.get("/transactions/", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_fast_json_matches_response_model(monkeypatch):
+    from app.config import settings
+
+    client.post("/auth/register", json={"name": "JSON", "email": "json@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "json@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    items = [
+        {"description": "pão de açúcar \"especial\"", "amount": 12.3, "type": "expense", "category": None,
+         "date": "2024-03-01T10:20:30.123456"},
+        {"description": "salário", "amount": 5000, "type": "income", "category": "Trabalho", "date": "2024-03-05T00:00:00"},
+        {"description": "centavos", "amount": 0.1, "type": "expense", "category": "Café", "date": "2024-03-06T00:00:00"},
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    for path, params in (("/transactions/", {"limit": 2}), ("/transactions/history", {"all": "true"})):
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        fast = client.get(path, params=params, headers=headers)
+        monkeypatch.setattr(settings, "FAST_JSON", False)
+        slow = client.get(path, params=params, headers=headers)
+
+        assert fast.status_code == slow.status_code == 200
+        assert fast.json() == slow.json()
+        assert fast.content == slow.content
+        assert fast.headers["content-type"] == slow.headers["content-type"]
+        assert fast.headers.get("x-next-cursor") == slow.headers.get("x-next-cursor")
+        assert fast.headers["etag"] == slow.headers["etag"]
+
+
+def test_search_transactions_full_text():
+    def login(email):
+        client.post("/auth/register", json={"name": "Busca", "email": email, "password": "123456"})
+        response = client.post("/auth/login", json={"email": email, "password": "123456"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    headers, other = login("busca@example.com"), login("busca-outro@example.com")
+    items = [
+        {"description": "Supermercado Pão de Açúcar", "amount": 120, "type": "expense", "category": "Mercado"},
+        {"description": "Padaria do bairro", "amount": 15, "type": "expense", "category": "Pão"},
+        {"description": "Uber para o trabalho", "amount": 30, "type": "expense", "category": "Transporte"},
+    ] + [
+        {"description": f"Mercado livre pedido {i}", "amount": i + 1, "type": "expense", "category": "Compras"}
+        for i in range(25)
+    ]
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+    client.post("/transactions/", json={**items[0], "description": "Pão do vizinho"}, headers=other)
+
+    def search(q, **params):
+        return client.get("/transactions/search", params={"q": q, **params}, headers=headers)
+
+    # Sem acento, por prefixo, na descrição ou na categoria, só do próprio usuário
+    descriptions = {t["description"] for t in search("pao").json()}
+    assert descriptions == {"Supermercado Pão de Açúcar", "Padaria do bairro"}
+    assert [t["description"] for t in search("açúcar super").json()] == ["Supermercado Pão de Açúcar"]
+    assert search("transp").json()[0]["category"] == "Transporte"
+    assert search("\"*) OR (").json() == []
+    assert search("").status_code == 422
+    # O user_id do índice só filtra: buscar o número do usuário não traz as transações dele
+    assert search(str(client.get("/users/profile", headers=headers).json()["id"])).json() == []
+
+    # Paginação com cursor sobre os resultados ordenados por relevância
+    first = search("mercado", limit=20)
+    assert len(first.json()) == 20
+    second = search("mercado", limit=20, cursor=first.headers["x-next-cursor"])
+    assert "x-next-cursor" not in second.headers
+    ids = [t["id"] for t in first.json() + second.json()]
+    assert len(ids) == len(set(ids)) == 26
+    assert search("mercado", cursor="inválido").status_code == 400
+
+    # O índice acompanha edições e exclusões
+    uber = search("uber").json()[0]
+    client.put(f"/transactions/{uber['id']}", json={"description": "Táxi para o aeroporto"}, headers=headers)
+    assert search("uber").json() == []
+    assert search("aeroporto").json()[0]["id"] == uber["id"]
+    client.delete(f"/transactions/{uber['id']}", headers=headers)
+    assert search("aeroporto").json() == []
+
+
+def test_forecast_trend_and_cache(count_queries):
+    client.post("/auth/register", json={"name": "Previsão", "email": "previsao@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "previsao@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    assert client.get("/transactions/forecast", headers=headers).json()["forecast"] == []
+
+    # Salário constante, mercado crescendo 100 por mês e um mês (abril) sem lazer
+    items = []
+    for month in range(1, 7):
+        items.append({"description": "salário", "amount": 5000, "type": "income", "category": "Salário",
+                      "date": f"2024-{month:02d}-05T00:00:00"})
+        items.append({"description": "mercado", "amount": 1000 + 100 * month, "type": "expense",
+                      "category": "Mercado", "date": f"2024-{month:02d}-10T00:00:00"})
+        if month != 4:
+            items.append({"description": "cinema", "amount": 60, "type": "expense", "category": "Lazer",
+                          "date": f"2024-{month:02d}-20T00:00:00"})
+    client.post("/transactions/bulk", json={"transactions": items}, headers=headers)
+
+    data = client.get("/transactions/forecast", params={"months": 3}, headers=headers).json()
+    assert [m["month"] for m in data["history"]] == [f"2024-{m:02d}" for m in range(1, 7)]
+    assert data["history"][3] == {"month": "2024-04", "income": 5000.0, "expense": 1400.0, "balance": 3600.0}
+    assert data["rolling_average"]["expense"] == round((1400 + 1560 + 1660) / 3, 2)
+    assert data["trend"]["income"] == {"slope": 0.0, "intercept": 5000.0}
+
+    assert [m["month"] for m in data["forecast"]] == ["2024-07", "2024-08", "2024-09"]
+    assert [m["income"] for m in data["forecast"]] == [5000.0] * 3
+    categories = {(c["type"], c["category"]): c["forecast"] for c in data["categories"]}
+    assert categories[("expense", "Mercado")] == [1700.0, 1800.0, 1900.0]
+    assert categories[("income", "Salário")] == [5000.0] * 3
+
+    # Segunda chamada sem escrita no meio: só a consulta da versão dos dados
+    count_queries.clear()
+    assert client.get("/transactions/forecast", params={"months": 3}, headers=headers).json() == data
+    assert len(count_queries) == 1
+
+    client.post("/transactions/", json={**items[0], "amount": 8000, "date": "2024-07-05T00:00:00"}, headers=headers)
+    updated = client.get("/transactions/forecast", params={"months": 3}, headers=headers).json()
+    assert updated["history"][-1]["month"] == "2024-07"
+
+    assert client.get("/transactions/forecast", params={"months": 0}, headers=headers).status_code == 422
@@ -64,4 +64,20 @@ def test_delete_user(client):
 
     login_data = {"email": "delete@example.com", "password": "123456"}
     login_response = client.post("/auth/login", json=login_data)
-    assert login_response.status_code in [401, 404]
\ No newline at end of file
+    assert login_response.status_code in [401, 404]
+
+def test_authenticated_user_cache(count_queries):
+    """Requisições autenticadas seguidas não consultam a tabela users; update_user invalida o cache"""
+    client.post("/auth/register", json={"name": "Cache", "email": "cache@example.com", "password": "123456"})
+    response = client.post("/auth/login", json={"email": "cache@example.com", "password": "123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    profile = client.get("/users/profile", headers=headers).json()
+    count_queries.clear()
+    client.get("/users/profile", headers=headers)
+    client.get("/transactions/summary", headers=headers)
+    # A única leitura de users é a versão dos dados usada no ETag, não a busca do usuário autenticado
+    assert not [q for q in count_queries if "FROM users" in q and "data_version" not in q]
+
+    client.put(f"/users/{profile['id']}", json={"name": "Cache Novo"})
+    assert client.get("/users/profile", headers=headers).json()["name"] == "Cache Novo"
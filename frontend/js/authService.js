@@ -2,6 +2,11 @@ import { API_BASE_URL } from "./config.js";
 
 const STORAGE_USER_KEY = 'moneyTrackUser';
 const STORAGE_TOKEN_KEY = 'accessToken';
+const STORAGE_REFRESH_KEY = 'refreshToken';
+
+// Renovação em andamento: o refresh token é de uso único, então pedidos que recebem 401 ao
+// mesmo tempo esperam a mesma renovação em vez de gastar o token cada um
+let refreshing = null;
 
 export const AuthService = {
     // --- Funções de API ---
@@ -40,6 +45,7 @@ export const AuthService = {
         if (response.ok) {
             console.log('[LOGIN] Login bem-sucedido! Salvando token e dados do usuário...');
             AuthService.setToken(data.access_token);
+            AuthService.setRefreshToken(data.refresh_token);
             if (data.user) { 
                 AuthService.saveUserData(data.user);
                 console.log('[LOGIN] Dados do usuário salvos:', data.user);
@@ -52,6 +58,45 @@ export const AuthService = {
         return { success: false, data, status: response.status, message: data.message || "Email ou senha inválidos." };
     },
     
+    // Troca o refresh token por um par novo (POST /auth/refresh). false = sessão encerrada
+    refreshTokens() {
+        if (!refreshing) {
+            refreshing = (async () => {
+                const refreshToken = AuthService.getRefreshToken();
+                if (!refreshToken) return false;
+                const response = await fetch(`${API_BASE_URL}/auth/refresh`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ refresh_token: refreshToken })
+                }).catch(() => null);
+                if (response && response.ok) {
+                    const data = await response.json();
+                    AuthService.setToken(data.access_token);
+                    AuthService.setRefreshToken(data.refresh_token);
+                    return true;
+                }
+                // Outra aba pode ter renovado primeiro (o token usado aqui já foi trocado)
+                return AuthService.getRefreshToken() !== refreshToken;
+            })().finally(() => { refreshing = null; });
+        }
+        return refreshing;
+    },
+
+    // fetch com o token de acesso; num 401 renova os tokens uma vez e repete o pedido
+    async authFetch(url, options = {}) {
+        const send = () => fetch(url, {
+            ...options,
+            headers: { ...(options.headers || {}), 'Authorization': `Bearer ${AuthService.getToken()}` }
+        });
+        const response = await send();
+        if (response.status !== 401) return response;
+
+        console.log('[AUTH] Token de acesso expirado, renovando...');
+        if (await AuthService.refreshTokens()) return send();
+        AuthService.logout();
+        return response;
+    },
+
     logout() {
         AuthService.removeToken();
         AuthService.removeUserData(); 
@@ -67,6 +112,15 @@ export const AuthService = {
     
     removeToken() {
         localStorage.removeItem(STORAGE_TOKEN_KEY);
+        localStorage.removeItem(STORAGE_REFRESH_KEY);
+    },
+
+    setRefreshToken(token) {
+        localStorage.setItem(STORAGE_REFRESH_KEY, token);
+    },
+
+    getRefreshToken() {
+        return localStorage.getItem(STORAGE_REFRESH_KEY);
     },
 
     saveUserData(user) {
@@ -2,15 +2,10 @@ import { API_BASE_URL } from "./config.js";
 import { AuthService } from "./authService.js";
 import { getCategories } from "./utils.js";
 
+// O Authorization é posto (e renovado num 401) pelo AuthService.authFetch
 function getAuthHeaders() {
-    const token = AuthService.getToken();
-    if (!token) {
-        // Redirecionamento pode ser necessário dependendo da arquitetura
-        // window.location.href = '/login.html'; 
-    }
     return {
-        'Content-Type': 'application/json',
-        'Authorization': `Bearer ${token}`
+        'Content-Type': 'application/json'
     };
 }
 
@@ -21,7 +16,7 @@ export const TransactionService = {
     async getTransactions() {
         console.log('[TRANSACTION-SERVICE] Buscando transações...');
         const headers = getAuthHeaders();
-        const response = await fetch(`${API_BASE_URL}/transactions/`, {
+        const response = await AuthService.authFetch(`${API_BASE_URL}/transactions/?all=true`, {
             method: 'GET',
             headers: headers
         });
@@ -87,7 +82,7 @@ export const TransactionService = {
 
         console.log('[TRANSACTION-SERVICE] Payload enviado:', payload);
 
-        const response = await fetch(`${API_BASE_URL}/transactions/`, {
+        const response = await AuthService.authFetch(`${API_BASE_URL}/transactions/`, {
             method: 'POST',
             headers: headers,
             body: JSON.stringify(payload)
@@ -120,7 +115,7 @@ export const TransactionService = {
             date: updatedTransaction.data ? updatedTransaction.data + "T00:00:00" : undefined 
         };
 
-        const response = await fetch(`${API_BASE_URL}/transactions/${id}`, {
+        const response = await AuthService.authFetch(`${API_BASE_URL}/transactions/${id}`, {
             method: 'PUT',
             headers: headers,
             body: JSON.stringify(payload)
@@ -139,7 +134,7 @@ export const TransactionService = {
     // ------------------------------------
     async deleteTransaction(id) {
         const headers = getAuthHeaders();
-        const response = await fetch(`${API_BASE_URL}/transactions/${id}`, {
+        const response = await AuthService.authFetch(`${API_BASE_URL}/transactions/${id}`, {
             method: 'DELETE',
             headers: headers
         });